@@ -1,8 +1,8 @@
 import sys
 import time
+import asyncio
 import struct
 import numpy as np
-import matplotlib.pyplot as plt
 # 使用通用的 Qt Agg 后端，兼容 PySide6
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
@@ -11,44 +11,68 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QComboBox,
                              QGroupBox, QGridLayout, QTableWidget, QTableWidgetItem,
                              QHeaderView, QMessageBox, QSplitter)
-from PySide6.QtCore import Qt, QTimer, Slot # 导入 Slot
+from PySide6.QtCore import Qt, QTimer, Slot, QObject, QThread, Signal # 导入 Slot, QObject, QThread, Signal
 from PySide6.QtGui import QFont # QFont 通常在 QtGui 中
-from pymodbus.client.serial import ModbusSerialClient
-from pymodbus.constants import Endian
-from pymodbus.payload import BinaryPayloadDecoder
+from pymodbus.client import AsyncModbusSerialClient
 import serial.tools.list_ports
-
-# 添加中文支持
-plt.rcParams['font.sans-serif'] = ['SimHei']
-plt.rcParams['axes.unicode_minus'] = False
+from waveform_kernels import scale_waveform, store_if_changed
+from plot_utils import configure_fonts
+
+# 可选波特率，第一项为默认值 (设备出厂设置)
+BAUDRATES = [9600, 19200, 38400, 57600, 115200]
+
+# 遥测参数及其在表格中的行顺序，read_telemetry_data 按此顺序返回元组
+PARAM_ORDER = ('TEV放电次数', 'TEV_dB值', 'TEV_mV值',
+               '超声波_dB值', '超声波_mV值',
+               'UHF_dB值', 'UHF_mV值')  # 移除'UHF放电次数'
+
+# 每种图谱的采样点数 (寄存器个数)
+WAVEFORM_POINTS = 128
+
+# 预编译的浮点解码格式: 两个寄存器按大端拼成 4 字节，再按大端浮点数解析
+# (结果与 pymodbus 的 convert_from_registers(..., DATATYPE.FLOAT32, word_order='little')
+# 相同，但后者每次调用都要做类型分派，耗时约为直接 struct 解码的 10 倍)
+_WORDS_BE = struct.Struct('>HH')
+_FLOAT_BE = struct.Struct('>f')
+# 遥测的三个 dB 浮点数 (102~107) 连续存放，整块一次解码:
+# 按小端打包后低位字在前，正好等价于字序小端、字节大端的浮点数
+_DB_BLOCK_WORDS = struct.Struct('<6H')
+_DB_BLOCK_FLOATS = struct.Struct('<3f')
 
 class AllSensorsReader:
     """读取 TEV, 超声波, UHF 传感器数据的类 (与GUI框架无关)"""
 
-    def __init__(self, port, slave_address=1):
+    def __init__(self, port, slave_address=1, baudrate=9600):
         """
         初始化监测装置连接
 
         参数:
             port: 串口名称，如 'COM1'
             slave_address: 从站地址，默认为1
+            baudrate: 波特率，默认为9600
         """
         self.port = port
-        self.client = ModbusSerialClient(
-            port=port,
-            baudrate=9600,
-            bytesize=8,
-            parity='N',
-            stopbits=1,
-            timeout=1
-        )
+        self.baudrate = baudrate
+        self.client = None # 异步客户端需在事件循环中创建，见 connect()
         self.slave_address = slave_address
         self.connected = False
+        # 三种图谱按行存放在同一块连续缓冲区中: 0=TEV, 1=超声波, 2=UHF
+        self._waveform_buf = np.zeros((3, WAVEFORM_POINTS), dtype=np.uint16)
 
-    def connect(self):
-        """建立与设备的连接"""
+    async def connect(self):
+        """建立与设备的连接 (需在 asyncio 事件循环中调用)"""
         try:
-            self.connected = self.client.connect()
+            self.client = AsyncModbusSerialClient(
+                port=self.port,
+                baudrate=self.baudrate,
+                bytesize=8,
+                parity='N',
+                stopbits=1,
+                # 超时按最长响应帧 (125 个寄存器约 255 字节) 的传输时间估算，
+                # 只需覆盖真正的超时，而不是固定等待 1 秒
+                timeout=max(0.1, 2 * 255 * 11 / self.baudrate)
+            )
+            self.connected = await self.client.connect()
         except Exception as e:
             print(f"连接时发生错误: {e}")
             self.connected = False
@@ -63,29 +87,35 @@ class AllSensorsReader:
             except Exception as e:
                 print(f"断开连接时发生错误: {e}")
 
-    def read_float(self, address):
+    async def read_float(self, address):
         """读取浮点型数据"""
         if not self.connected: return None
         try:
-            response = self.client.read_input_registers(address=address, count=2, slave=self.slave_address)
+            response = await self.client.read_input_registers(address=address, count=2, slave=self.slave_address)
             if response.isError():
                 print(f"读取寄存器 {address} (float) 错误: {response}")
                 return None
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                response.registers,
-                byteorder=Endian.BIG,
-                wordorder=Endian.LITTLE
-            )
-            return decoder.decode_32bit_float()
+            return self._decode_float(response.registers)
         except Exception as e:
             print(f"读取浮点数据时发生异常 (地址 {address}): {e}")
             return None
 
-    def read_short(self, address):
+    @staticmethod
+    def _decode_float(registers):
+        """将两个寄存器解码为浮点数 (字节大端, 字序小端: 低位字在前)"""
+        low, high = registers
+        return _FLOAT_BE.unpack(_WORDS_BE.pack(high, low))[0]
+
+    @staticmethod
+    def _decode_db_block(registers):
+        """将 102~107 六个寄存器一次解码为 (TEV, 超声波, UHF) 三个 dB 浮点数"""
+        return _DB_BLOCK_FLOATS.unpack(_DB_BLOCK_WORDS.pack(*registers))
+
+    async def read_short(self, address):
         """读取短整型数据"""
         if not self.connected: return None
         try:
-            response = self.client.read_input_registers(address=address, count=1, slave=self.slave_address)
+            response = await self.client.read_input_registers(address=address, count=1, slave=self.slave_address)
             if response.isError():
                 print(f"读取寄存器 {address} (short) 错误: {response}")
                 return None
@@ -94,104 +124,278 @@ class AllSensorsReader:
             print(f"读取短整型数据时发生异常 (地址 {address}): {e}")
             return None
 
-    def read_telemetry_data(self):
-        """读取所有遥测数据"""
+    async def read_telemetry_data(self):
+        """读取所有遥测数据 (一次读取 100~111 寄存器，本地解析)，按 PARAM_ORDER 顺序返回元组"""
         if not self.connected: return None
+        try:
+            response = await self.client.read_input_registers(address=100, count=12, slave=self.slave_address)
+            if response.isError():
+                print(f"批量读取遥测寄存器错误: {response}，改为逐个读取")
+                return await self._read_telemetry_data_single()
+        except Exception as e:
+            print(f"批量读取遥测数据时发生异常: {e}，改为逐个读取")
+            return await self._read_telemetry_data_single()
+
+        regs = response.registers
+        tev_db, ultrasonic_db, uhf_db = self._decode_db_block(regs[2:8])   # 102-107
+        return (regs[0], tev_db, regs[9],        # 100, 102-103, 109
+                ultrasonic_db, regs[10],        # 104-105, 110
+                uhf_db, regs[11])               # 106-107, 111
+
+    async def _read_telemetry_data_single(self):
+        """逐个寄存器读取遥测数据 (批量读取失败时的后备方案)"""
         data = {}
         read_success = True
-        tev_count = self.read_short(100); data['TEV放电次数'] = tev_count if tev_count is not None else None; read_success &= (tev_count is not None)
-        # uhf_count = self.read_short(101); data['UHF放电次数'] = uhf_count if uhf_count is not None else None; read_success &= (uhf_count is not None)
-        tev_mv = self.read_short(109); data['TEV_mV值'] = tev_mv if tev_mv is not None else None; read_success &= (tev_mv is not None)
-        ultrasonic_mv = self.read_short(110); data['超声波_mV值'] = ultrasonic_mv if ultrasonic_mv is not None else None; read_success &= (ultrasonic_mv is not None)
-        uhf_mv = self.read_short(111); data['UHF_mV值'] = uhf_mv if uhf_mv is not None else None; read_success &= (uhf_mv is not None)
-        tev_db = self.read_float(102); data['TEV_dB值'] = tev_db if tev_db is not None else None; read_success &= (tev_db is not None)
-        ultrasonic_db = self.read_float(104); data['超声波_dB值'] = ultrasonic_db if ultrasonic_db is not None else None; read_success &= (ultrasonic_db is not None)
-        uhf_db = self.read_float(106); data['UHF_dB值'] = uhf_db if uhf_db is not None else None; read_success &= (uhf_db is not None)
+        tev_count = await self.read_short(100); data['TEV放电次数'] = tev_count if tev_count is not None else None; read_success &= (tev_count is not None)
+        # uhf_count = await self.read_short(101); data['UHF放电次数'] = uhf_count if uhf_count is not None else None; read_success &= (uhf_count is not None)
+        tev_mv = await self.read_short(109); data['TEV_mV值'] = tev_mv if tev_mv is not None else None; read_success &= (tev_mv is not None)
+        ultrasonic_mv = await self.read_short(110); data['超声波_mV值'] = ultrasonic_mv if ultrasonic_mv is not None else None; read_success &= (ultrasonic_mv is not None)
+        uhf_mv = await self.read_short(111); data['UHF_mV值'] = uhf_mv if uhf_mv is not None else None; read_success &= (uhf_mv is not None)
+        tev_db = await self.read_float(102); data['TEV_dB值'] = tev_db if tev_db is not None else None; read_success &= (tev_db is not None)
+        ultrasonic_db = await self.read_float(104); data['超声波_dB值'] = ultrasonic_db if ultrasonic_db is not None else None; read_success &= (ultrasonic_db is not None)
+        uhf_db = await self.read_float(106); data['UHF_dB值'] = uhf_db if uhf_db is not None else None; read_success &= (uhf_db is not None)
 
         if not read_success:
             print("警告：部分遥测数据读取失败")
-        return data
+        return tuple(data[key] for key in PARAM_ORDER)
+
+    async def read_waveform_data(self, max_read_count=125):
+        """
+        读取三种图谱数据
 
-    def read_waveform_data(self, max_read_count=125):
-        """读取三种图谱数据"""
+        返回长度为 3 的列表 (TEV, 超声波, UHF)，每项是内部缓冲区对应行的视图，
+        读取失败的图谱为 None。缓冲区在下一次读取时会被覆盖。
+        """
         if not self.connected: return None
-        waveforms = {}
+        waveforms = [None, None, None]
         read_success = True
-        waveform_info = {
-            'TEV图谱': {'start_address': 2000, 'registers_to_read': 128},
-            '超声波图谱': {'start_address': 2128, 'registers_to_read': 128},
-            'UHF图谱': {'start_address': 2256, 'registers_to_read': 128},
-        }
-        for name, info in waveform_info.items():
-            waveform_data = []
-            start_address = info['start_address']
-            registers_to_read = info['registers_to_read']
-            current_address = start_address
+        waveform_info = (
+            ('TEV图谱', 2000),
+            ('超声波图谱', 2128),
+            ('UHF图谱', 2256),
+        )
+        for row, (name, start_address) in enumerate(waveform_info):
+            buf = self._waveform_buf[row]
+            offset = 0
             error_occurred = False
             try:
-                while registers_to_read > 0:
-                    count = min(registers_to_read, max_read_count)
-                    response = self.client.read_input_registers(address=current_address, count=count, slave=self.slave_address)
+                while offset < WAVEFORM_POINTS:
+                    count = min(WAVEFORM_POINTS - offset, max_read_count)
+                    current_address = start_address + offset
+                    response = await self.client.read_input_registers(address=current_address, count=count, slave=self.slave_address)
                     if response.isError():
                         print(f"    读取 {name} 数据错误 (地址 {current_address}, 数量 {count}): {response}")
                         error_occurred = True; break
-                    waveform_data.extend(response.registers)
-                    registers_to_read -= count
-                    current_address += count
-                    time.sleep(0.1) # 避免请求过于频繁
+                    buf[offset:offset + count] = response.registers
+                    offset += count
                 if not error_occurred:
-                    waveforms[name] = waveform_data
+                    waveforms[row] = buf
                 else:
-                    waveforms[name] = []; read_success = False
+                    read_success = False
             except Exception as e:
                 print(f"  读取 {name} 时发生异常: {e}")
-                waveforms[name] = []; read_success = False; break
+                read_success = False; break
         if not read_success:
             print("警告：部分图谱数据读取失败或发生异常")
         return waveforms
 
+# --- Modbus 工作对象 ---
+class ModbusWorker(QObject):
+    """在后台线程中执行所有串口读写，读取结果通过信号交给界面线程
+
+    串口读写使用 pymodbus 异步客户端，由工作线程自己的 asyncio 事件循环驱动，
+    界面线程的 Qt 事件循环不受影响。
+    """
+    connected = Signal(bool, str)   # (是否连接成功, 串口名)
+    telemetry_ready = Signal(object) # 按 PARAM_ORDER 顺序的元组
+    waveforms_ready = Signal(object) # [TEV, 超声波, UHF]，失败的项为 None
+    read_finished = Signal()        # 一轮读取结束 (无论成功与否)
+    error_occurred = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.reader = None # AllSensorsReader 实例只在工作线程中使用
+        self._loop = None  # 工作线程的 asyncio 事件循环，首次使用时创建
+
+    def _run(self, coro):
+        """在工作线程的事件循环中执行协程并返回结果"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    @Slot(str, int)
+    def connect_device(self, port, baudrate):
+        """在工作线程中打开串口"""
+        self.disconnect_device()
+        reader = AllSensorsReader(port, baudrate=baudrate)
+        if self._run(reader.connect()):
+            self.reader = reader
+        self.connected.emit(self.reader is not None, port)
+
+    @Slot()
+    def disconnect_device(self):
+        """在工作线程中关闭串口"""
+        if self.reader:
+            # 在事件循环中关闭，关闭时取消的任务和移除的回调可以执行完
+            self._run(self._close_reader(self.reader))
+        self.reader = None
+
+    @staticmethod
+    async def _close_reader(reader):
+        """关闭读取器的串口，并让出一次事件循环"""
+        reader.disconnect()
+        await asyncio.sleep(0)
+
+    @Slot()
+    def shutdown(self):
+        """关闭串口和工作线程的 asyncio 事件循环 (在工作线程结束前调用)"""
+        self.disconnect_device()
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    @Slot(bool)
+    def read_all(self, read_waveforms=True):
+        """读取遥测数据，read_waveforms 为 True 时再读取图谱数据"""
+        try:
+            if not self.reader or not self.reader.connected:
+                self.error_occurred.emit("设备未连接")
+                return
+            telemetry_data = self._run(self.reader.read_telemetry_data())
+            self.telemetry_ready.emit(telemetry_data or ())
+            if read_waveforms:
+                waveform_data = self._run(self.reader.read_waveform_data())
+                # 发出的是读取器缓冲区的视图，不做拷贝: 界面在 read_finished 时才显示，
+                # 显示完才会请求下一轮读取，显示时缓冲区不会被改写
+                self.waveforms_ready.emit(waveform_data or [])
+        except Exception as e:
+            self.error_occurred.emit(f"读取数据异常: {str(e)}")
+        finally:
+            self.read_finished.emit()
+
 # --- Matplotlib Canvas Class (使用 PySide6) ---
 class MonitorCanvas(FigureCanvas):
-    """通用数据显示画布"""
-    def __init__(self, parent=None, width=5, height=2, dpi=100):
+    """通用数据显示画布 (刷新时只重绘曲线，坐标轴等静态背景通过 blit 复用)"""
+    def __init__(self, parent=None, width=5, height=2, dpi=100, gain=1.0, offset=0.0):
+        """gain, offset: 寄存器原始值到显示幅值的换算，显示值 = 原始值 * gain + offset"""
+        configure_fonts()
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = self.fig.add_subplot(111)
         super(MonitorCanvas, self).__init__(self.fig)
         self.setParent(parent)
+        self.axes.set_xlabel('采样点')
+        self.axes.set_ylabel('幅值')
+        self.axes.grid(True)
+        # 曲线设为 animated，完整重绘时不画进背景，由 blit 单独绘制
+        self.line, = self.axes.plot([], [], 'b-', animated=True)
+        # 预分配横坐标和数据缓冲区，刷新时只复制数据，不再每次由列表转换数组
+        self._x = np.arange(WAVEFORM_POINTS, dtype=np.int32)
+        self._y = np.zeros(WAVEFORM_POINTS, dtype=np.float32)
+        self._raw = np.zeros(WAVEFORM_POINTS, dtype=np.uint16) # 上次的寄存器原始值
+        self._count = 0 # 当前曲线的点数
+        self.gain = gain
+        self.offset = offset
+        self.background = None
+        self.mpl_connect('draw_event', self._on_draw)
+        # 布局只与画布尺寸有关，创建和缩放时计算一次即可，不必每次初始化图表都重算
+        self.mpl_connect('resize_event', self._on_resize)
+        self.fig.tight_layout()
         self.init_plot("图谱数据")
 
+    def _on_resize(self, event):
+        """画布尺寸变化后重新计算布局 (随后的完整重绘会更新背景缓存)"""
+        self.fig.tight_layout()
+
+    def _on_draw(self, event):
+        """每次完整重绘 (包括窗口缩放) 后重新缓存背景并补画曲线"""
+        self.background = self.copy_from_bbox(self.axes.bbox)
+        self.axes.draw_artist(self.line)
+
     def init_plot(self, title="图谱数据"):
         """初始化图表"""
-        self.axes.clear()
+        self.line.set_data([], [])
+        self._count = 0
         self.axes.set_title(title)
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
-        self.fig.tight_layout()
         self.draw()
 
     def update_plot(self, data, title="图谱数据"):
         """更新图表数据"""
-        self.axes.clear()
-        if data:
-             self.axes.plot(data, 'b-')
-        self.axes.set_title(title)
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
-        self.fig.tight_layout()
-        self.draw()
+        count = len(data)
+        if count > len(self._x):
+            self._x = np.arange(count, dtype=np.int32)
+            self._y = np.zeros(count, dtype=np.float32)
+            self._raw = np.zeros(count, dtype=np.uint16)
+        raw = self._raw[:count]
+        changed = store_if_changed(raw, data) or count != self._count
+        if self.background is not None and not changed and title == self.axes.get_title():
+            return
+        self._count = count
+        # 换算结果直接写入预分配的缓冲区
+        y = self._y[:count]
+        scale_waveform(raw, self.gain, self.offset, y)
+        self.line.set_data(self._x[:count], y)
+        full_redraw = self.background is None or title != self.axes.get_title()
+        if count and self._update_limits(count, float(y.min()), float(y.max())):
+            full_redraw = True
+
+        if full_redraw:
+            # 标题或坐标范围变化时才完整重绘，背景在 _on_draw 中重新缓存
+            self.axes.set_title(title)
+            self.draw()
+        else:
+            self.restore_region(self.background)
+            self.axes.draw_artist(self.line)
+            self.blit(self.axes.bbox)
+
+    def _update_limits(self, count, low, high):
+        """数据超出当前范围或明显变小时调整坐标范围，返回是否调整"""
+        y_min, y_max = self.axes.get_ylim()
+        x_max = max(count - 1, 1)
+        margin = (high - low) * 0.05 or 1
+        if (self.axes.get_xlim() == (0, x_max) and y_min <= low and high <= y_max
+                and (y_max - y_min) <= 4 * (high - low + 2 * margin)):
+            return False
+        self.axes.set_xlim(0, x_max)
+        self.axes.set_ylim(low - margin, high + margin)
+        return True
 
 # --- 主应用窗口类 (使用 PySide6) ---
 class AllSensorsApp(QMainWindow):
+    # 发往工作线程的请求 (跨线程连接，自动以队列方式执行)
+    connect_requested = Signal(str, int)
+    disconnect_requested = Signal()
+    read_requested = Signal(bool)    # 参数: 是否同时读取图谱
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle('GP-开关柜多传感器监测软件 (PySide6)')
         self.setGeometry(100, 100, 1000, 700)
 
-        self.reader = None
+        self.is_connected = False
+        self.read_pending = False # 上一轮读取尚未完成时不再重复请求
+        # 本轮已收到、等 read_finished 时一起显示的数据 (None 表示本轮没有)
+        self._pending_telemetry = None
+        self._pending_waveforms = None
+        self.disp_skip = 1 # 自动刷新时每 disp_skip 次才读取并重绘一次图谱
+        self._tick = 0
         self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_data)
+        self.timer.timeout.connect(self._auto_refresh_tick)
+
+        # --- 串口读写工作线程 ---
+        self.worker_thread = QThread(self)
+        self.worker = ModbusWorker()
+        self.worker.moveToThread(self.worker_thread)
+        self.connect_requested.connect(self.worker.connect_device)
+        self.disconnect_requested.connect(self.worker.disconnect_device)
+        self.read_requested.connect(self.worker.read_all)
+        self.worker.connected.connect(self._handle_connected)
+        self.worker.telemetry_ready.connect(self._handle_telemetry_data)
+        self.worker.waveforms_ready.connect(self._handle_waveforms_data)
+        self.worker.read_finished.connect(self._handle_read_finished)
+        self.worker.error_occurred.connect(self._handle_worker_error)
+        # finished 在工作线程中发出，直接连接使 shutdown 在该线程退出前执行
+        self.worker_thread.finished.connect(self.worker.shutdown, Qt.ConnectionType.DirectConnection)
+        self.worker_thread.start()
 
         self.initUI()
         self.refresh_ports()
@@ -208,6 +412,10 @@ class AllSensorsApp(QMainWindow):
 
         self.port_combo = QComboBox()
         self.port_combo.setToolTip("选择设备连接的串口")
+        self.baud_combo = QComboBox()
+        self.baud_combo.setToolTip("选择串口波特率 (需与设备设置一致)")
+        for baud in BAUDRATES:
+            self.baud_combo.addItem(str(baud), baud)
         self.refresh_button = QPushButton("刷新串口")
         self.refresh_button.clicked.connect(self.refresh_ports) # PySide6 信号连接
         self.connect_button = QPushButton("连接")
@@ -218,6 +426,8 @@ class AllSensorsApp(QMainWindow):
 
         connection_layout.addWidget(QLabel("串口:"))
         connection_layout.addWidget(self.port_combo, 1)
+        connection_layout.addWidget(QLabel("波特率:"))
+        connection_layout.addWidget(self.baud_combo)
         connection_layout.addWidget(self.refresh_button)
         connection_layout.addWidget(self.connect_button)
         connection_layout.addWidget(self.disconnect_button)
@@ -241,12 +451,15 @@ class AllSensorsApp(QMainWindow):
         self.telemetry_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         self.telemetry_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers) # PySide6 枚举
 
-        param_names = ['TEV放电次数', 'TEV_dB值', 'TEV_mV值',
-                       '超声波_dB值', '超声波_mV值',
-                       'UHF_dB值', 'UHF_mV值']  # 移除'UHF放电次数'
-        for i, name in enumerate(param_names):
+        # 数值列的单元格只创建一次，刷新时直接 setText
+        self._value_items = [QTableWidgetItem('--') for _ in PARAM_ORDER]
+        # 每行的数据类型固定 (dB 值为浮点数，其余为整数)，按行预先选好格式化函数
+        self._formatters = [str, '{:.2f}'.format, str,
+                            '{:.2f}'.format, str,
+                            '{:.2f}'.format, str]
+        for i, name in enumerate(PARAM_ORDER):
             self.telemetry_table.setItem(i, 0, QTableWidgetItem(name))
-            self.telemetry_table.setItem(i, 1, QTableWidgetItem('--'))
+            self.telemetry_table.setItem(i, 1, self._value_items[i])
 
         telemetry_layout.addWidget(self.telemetry_table)
         splitter.addWidget(telemetry_group)
@@ -279,9 +492,16 @@ class AllSensorsApp(QMainWindow):
         self.manual_refresh_button = QPushButton("手动刷新数据")
         self.manual_refresh_button.clicked.connect(self.update_data) # PySide6 信号连接
         self.manual_refresh_button.setEnabled(False)
+        self.disp_skip_combo = QComboBox()
+        self.disp_skip_combo.setToolTip("自动刷新时遥测数据每次都读取，图谱每隔几次才读取并重绘")
+        for skip in [1, 2, 3, 5]:
+            self.disp_skip_combo.addItem('每次' if skip == 1 else f'每{skip}次', skip)
+        self.disp_skip_combo.currentIndexChanged.connect(self.set_disp_skip)
 
         refresh_control_layout.addWidget(QLabel("自动刷新:"))
         refresh_control_layout.addWidget(self.auto_refresh_combo)
+        refresh_control_layout.addWidget(QLabel("图谱刷新:"))
+        refresh_control_layout.addWidget(self.disp_skip_combo)
         refresh_control_layout.addWidget(self.manual_refresh_button)
         refresh_control_layout.addStretch()
 
@@ -311,7 +531,7 @@ class AllSensorsApp(QMainWindow):
 
     @Slot()
     def connect_device(self):
-        """连接到选定的设备"""
+        """连接到选定的设备 (在工作线程中完成)"""
         selected_index = self.port_combo.currentIndex()
         if selected_index == -1 or not self.port_combo.itemData(selected_index):
              QMessageBox.warning(self, "连接错误", "请选择一个有效的串口")
@@ -319,39 +539,48 @@ class AllSensorsApp(QMainWindow):
 
         port_name = self.port_combo.itemData(selected_index)
         self.statusBar().showMessage(f'正在连接 {port_name}...')
-        QApplication.processEvents()
+        self.connect_button.setEnabled(False)
 
-        if self.reader and self.reader.connected:
+        if self.is_connected:
             self.disconnect_device()
 
-        self.reader = AllSensorsReader(port_name)
-        if self.reader.connect():
+        self.connect_requested.emit(port_name, self.baud_combo.currentData())
+
+    @Slot(bool, str)
+    def _handle_connected(self, success, port_name):
+        """处理工作线程返回的连接结果"""
+        if success:
+            self.is_connected = True
             self.statusBar().showMessage(f'成功连接到 {port_name}')
             self.connect_button.setEnabled(False)
             self.disconnect_button.setEnabled(True)
             self.port_combo.setEnabled(False)
+            self.baud_combo.setEnabled(False)
             self.refresh_button.setEnabled(False)
             self.manual_refresh_button.setEnabled(True)
             self.set_auto_refresh(self.auto_refresh_combo.currentIndex())
             self.update_data()
         else:
+            self.connect_button.setEnabled(True)
             QMessageBox.critical(self, "连接失败", f"无法连接到 {port_name}。\n请检查设备是否连接或被占用。")
             self.statusBar().showMessage('连接失败')
-            self.reader = None
 
     @Slot()
     def disconnect_device(self):
         """断开设备连接"""
-        if self.reader and self.reader.connected:
+        if self.is_connected:
             self.timer.stop()
-            self.reader.disconnect()
+            self.is_connected = False
+            self.read_pending = False
+            self._pending_telemetry = self._pending_waveforms = None
+            self.disconnect_requested.emit() # 排在未完成的读取之后执行
             self.statusBar().showMessage('设备已断开')
             self.connect_button.setEnabled(True)
             self.disconnect_button.setEnabled(False)
             self.port_combo.setEnabled(True)
+            self.baud_combo.setEnabled(True)
             self.refresh_button.setEnabled(True)
             self.manual_refresh_button.setEnabled(False)
-            self.reader = None
             self.clear_display()
         else:
             self.statusBar().showMessage('设备未连接')
@@ -365,73 +594,122 @@ class AllSensorsApp(QMainWindow):
         else:
             intervals = [1000, 2000, 5000, 10000]
             interval = intervals[index - 1]
-            if self.reader and self.reader.connected:
+            if self.is_connected:
                 self.timer.start(interval)
                 self.statusBar().showMessage(f'自动刷新间隔: {interval/1000} 秒')
             else:
                  self.statusBar().showMessage('请先连接设备以启动自动刷新')
 
+    @Slot(int)
+    def set_disp_skip(self, index):
+        """设置图谱刷新间隔 (自动刷新次数)"""
+        self.disp_skip = self.disp_skip_combo.itemData(index)
+        self._tick = 0
+
+    @Slot()
+    def _auto_refresh_tick(self):
+        """自动刷新: 遥测数据每次读取，图谱每 disp_skip 次读取并重绘一次"""
+        if self._request_data(self._tick % self.disp_skip == 0):
+            self._tick += 1
+
     @Slot()
     def update_data(self):
-        """更新遥测和图谱数据"""
-        if not self.reader or not self.reader.connected:
+        """请求工作线程读取遥测和图谱数据"""
+        self._request_data(True)
+
+    def _request_data(self, read_waveforms):
+        """向工作线程发出读取请求，返回是否已发出"""
+        if not self.is_connected:
             if self.timer.isActive():
                 self.timer.stop()
                 self.auto_refresh_combo.setCurrentIndex(0)
                 QMessageBox.warning(self, "连接断开", "设备连接已断开，自动刷新已停止。")
-            return
+            return False
 
+        if self.read_pending:
+            return False # 上一轮读取还在进行，跳过本次
+        self.read_pending = True
         self.statusBar().showMessage('正在读取数据...')
-        QApplication.processEvents()
+        self.read_requested.emit(read_waveforms)
+        return True
+
+    @Slot(object)
+    def _handle_telemetry_data(self, telemetry_data):
+        """暂存工作线程读取到的遥测数据，本轮读取结束时再显示"""
+        if not self.is_connected:
+            return
+        self._pending_telemetry = telemetry_data
 
-        # --- 读取遥测数据 ---
-        telemetry_data = self.reader.read_telemetry_data()
+    def _show_telemetry_data(self, telemetry_data):
+        """把遥测数据写入表格"""
         if telemetry_data:
-            param_map = {
-                'TEV放电次数': 0, 'TEV_dB值': 1, 'TEV_mV值': 2,
-                '超声波_dB值': 3, '超声波_mV值': 4,
-                'UHF_dB值': 5, 'UHF_mV值': 6
-            }  # 移除'UHF放电次数'并调整后续索引
-            for key, value in telemetry_data.items():
-                row = param_map.get(key)
-                if row is not None:
-                    display_value = '--'
-                    if value is not None:
-                        if isinstance(value, float):
-                            display_value = f"{value:.2f}"
-                        else:
-                            display_value = str(value)
-                    self.telemetry_table.setItem(row, 1, QTableWidgetItem(display_value))
+            # telemetry_data 与表格行同为 PARAM_ORDER 顺序，直接按位置对应
+            for item, fmt, value in zip(self._value_items, self._formatters, telemetry_data):
+                item.setText('--' if value is None else fmt(value))
         else:
             print("读取遥测数据失败")
-            for i in range(self.telemetry_table.rowCount()):
-                 self.telemetry_table.setItem(i, 1, QTableWidgetItem('读取失败'))
+            for item in self._value_items:
+                 item.setText('读取失败')
+
+    @Slot(object)
+    def _handle_waveforms_data(self, waveform_data):
+        """暂存工作线程读取到的图谱数据，本轮读取结束时再显示"""
+        if not self.is_connected:
+            return
+        self._pending_waveforms = waveform_data
 
-        # --- 读取图谱数据 ---
-        waveform_data = self.reader.read_waveform_data()
+    def _show_waveforms_data(self, waveform_data):
+        """把图谱数据画到三个画布上"""
         if waveform_data:
-            self.tev_canvas.update_plot(waveform_data.get('TEV图谱', []), "TEV图谱")
-            self.ultrasonic_canvas.update_plot(waveform_data.get('超声波图谱', []), "超声波图谱")
-            self.uhf_canvas.update_plot(waveform_data.get('UHF图谱', []), "UHF图谱")
+            tev, ultrasonic, uhf = waveform_data
+            self.tev_canvas.update_plot(tev if tev is not None else [], "TEV图谱")
+            self.ultrasonic_canvas.update_plot(ultrasonic if ultrasonic is not None else [], "超声波图谱")
+            self.uhf_canvas.update_plot(uhf if uhf is not None else [], "UHF图谱")
         else:
             print("读取图谱数据失败")
             self.tev_canvas.init_plot("TEV图谱 (读取失败)")
             self.ultrasonic_canvas.init_plot("超声波图谱 (读取失败)")
             self.uhf_canvas.init_plot("UHF图谱 (读取失败)")
 
+    @Slot()
+    def _handle_read_finished(self):
+        """一轮读取结束: 显示本轮读到的遥测和图谱数据"""
+        self.read_pending = False
+        telemetry_data, self._pending_telemetry = self._pending_telemetry, None
+        waveform_data, self._pending_waveforms = self._pending_waveforms, None
+        if not self.is_connected:
+            return
+
+        if telemetry_data is not None:
+            # 各单元格更新完后表格统一重绘一次; 画布不在此列，仍用 blit 只重绘曲线
+            self.telemetry_table.setUpdatesEnabled(False)
+            try:
+                self._show_telemetry_data(telemetry_data)
+            finally:
+                self.telemetry_table.setUpdatesEnabled(True)
+        if waveform_data is not None:
+            self._show_waveforms_data(waveform_data)
         self.statusBar().showMessage('数据已更新 ' + time.strftime('%H:%M:%S'))
 
+    @Slot(str)
+    def _handle_worker_error(self, error_message):
+        """处理工作线程发送的错误信息"""
+        print(f"工作线程错误: {error_message}")
+        self.statusBar().showMessage(f'错误: {error_message}')
+
     def clear_display(self):
          """清空数据显示区域"""
-         for i in range(self.telemetry_table.rowCount()):
-             self.telemetry_table.setItem(i, 1, QTableWidgetItem('--'))
+         for item in self._value_items:
+             item.setText('--')
          self.tev_canvas.init_plot("TEV图谱")
          self.ultrasonic_canvas.init_plot("超声波图谱")
          self.uhf_canvas.init_plot("UHF图谱")
 
     def closeEvent(self, event):
-        """关闭窗口前确保断开连接"""
+        """关闭窗口前确保断开连接并结束工作线程"""
         self.disconnect_device()
+        self.worker_thread.quit()
+        self.worker_thread.wait() # 线程退出前由 shutdown 关闭串口和事件循环
         event.accept()
 
 def main_gui():
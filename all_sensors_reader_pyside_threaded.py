@@ -1,8 +1,10 @@
 import sys
 import time
+import queue
+import asyncio
+import logging
 import struct
 import numpy as np
-import matplotlib.pyplot as plt
 # 使用通用的 Qt Agg 后端，兼容 PySide6
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
@@ -13,42 +15,74 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHeaderView, QMessageBox, QSplitter)
 from PySide6.QtCore import Qt, QTimer, Slot, QThread, Signal # 导入 Slot, QThread, Signal
 from PySide6.QtGui import QFont # QFont 通常在 QtGui 中
-from pymodbus.client.serial import ModbusSerialClient
-from pymodbus.constants import Endian
-from pymodbus.payload import BinaryPayloadDecoder
+from pymodbus.client import AsyncModbusSerialClient
 import serial.tools.list_ports
+from waveform_kernels import scale_waveform, store_if_changed
+from plot_utils import configure_fonts
+from serial_utils import tune_serial
 
-# 添加中文支持
-plt.rcParams['font.sans-serif'] = ['SimHei']
-plt.rcParams['axes.unicode_minus'] = False
+# pymodbus 每个事务都会记录调试日志，只保留警告及以上级别
+logging.getLogger('pymodbus').setLevel(logging.WARNING)
+
+# 可选波特率，第一项为默认值 (设备出厂设置)
+BAUDRATES = [9600, 19200, 38400, 57600, 115200]
+
+# 遥测参数 (与表格行一一对应)，读取结果按此顺序以元组返回
+PARAM_ORDER = ('TEV放电次数', 'TEV_dB值', 'TEV_mV值',
+               '超声波_dB值', '超声波_mV值',
+               'UHF_dB值', 'UHF_mV值')  # 移除'UHF放电次数'
+
+# 三种图谱 (寄存器 2000~2383 依次存放)，读取结果按此顺序排列
+WAVEFORM_NAMES = ('TEV图谱', '超声波图谱', 'UHF图谱')
+WAVEFORM_POINTS = 128 # 每种图谱的采样点数
+
+# 预编译的浮点解码格式: 两个寄存器按大端拼成 4 字节，再按大端浮点数解析，
+# 避免每次调用 struct.pack/unpack 时重新解析格式字符串
+_WORDS_BE = struct.Struct('>HH')
+_FLOAT_BE = struct.Struct('>f')
+# 102~107 三个浮点数 (每个占两个寄存器，低位字在前) 按小端打包后即为三个小端 float
+_DB_BLOCK_WORDS = struct.Struct('<6H')
+_DB_BLOCK_FLOATS = struct.Struct('<3f')
 
 class AllSensorsReader:
     """读取 TEV, 超声波, UHF 传感器数据的类 (与GUI框架无关)"""
 
-    def __init__(self, port, slave_address=1):
+    def __init__(self, port, slave_address=1, baudrate=9600):
         """
         初始化监测装置连接
 
         参数:
             port: 串口名称，如 'COM1'
             slave_address: 从站地址，默认为1
+            baudrate: 波特率，默认为9600
         """
         self.port = port
-        self.client = ModbusSerialClient(
-            port=port,
-            baudrate=9600,
-            bytesize=8,
-            parity='N',
-            stopbits=1,
-            timeout=1
-        )
+        self.baudrate = baudrate
+        self.client = None # 异步客户端需在事件循环中创建，见 connect()
         self.slave_address = slave_address
         self.connected = False
 
-    def connect(self):
-        """建立与设备的连接"""
+    async def connect(self):
+        """建立与设备的连接 (需在 asyncio 事件循环中调用)"""
         try:
-            self.connected = self.client.connect()
+            self.client = AsyncModbusSerialClient(
+                port=self.port,
+                baudrate=self.baudrate,
+                bytesize=8,
+                parity='N',
+                stopbits=1,
+                # 超时按最长响应帧 (125 个寄存器约 255 字节) 的传输时间估算，
+                # 只需覆盖真正的超时，而不是固定等待 1 秒
+                timeout=max(0.1, 2 * 255 * 11 / self.baudrate),
+                # 读取失败时不在本次刷新内重发 (每次重发都要再等一个超时)，
+                # 下一次刷新会重新读取
+                retries=0
+            )
+            self.connected = await self.client.connect()
+            if self.connected:
+                # 异步客户端的 pyserial 对象保存在传输层的 sync_serial 中
+                transport = getattr(self.client.ctx, 'transport', None)
+                tune_serial(getattr(transport, 'sync_serial', None))
         except Exception as e:
             print(f"连接时发生错误: {e}")
             self.connected = False
@@ -63,29 +97,24 @@ class AllSensorsReader:
             except Exception as e:
                 print(f"断开连接时发生错误: {e}")
 
-    def read_float(self, address):
+    async def read_float(self, address):
         """读取浮点型数据"""
         if not self.connected: return None
         try:
-            response = self.client.read_input_registers(address=address, count=2, slave=self.slave_address)
+            response = await self.client.read_input_registers(address=address, count=2, slave=self.slave_address)
             if response.isError():
                 print(f"读取寄存器 {address} (float) 错误: {response}")
                 return None
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                response.registers,
-                byteorder=Endian.BIG,
-                wordorder=Endian.LITTLE
-            )
-            return decoder.decode_32bit_float()
+            return self._decode_float(response.registers)
         except Exception as e:
             print(f"读取浮点数据时发生异常 (地址 {address}): {e}")
             return None
 
-    def read_short(self, address):
+    async def read_short(self, address):
         """读取短整型数据"""
         if not self.connected: return None
         try:
-            response = self.client.read_input_registers(address=address, count=1, slave=self.slave_address)
+            response = await self.client.read_input_registers(address=address, count=1, slave=self.slave_address)
             if response.isError():
                 print(f"读取寄存器 {address} (short) 错误: {response}")
                 return None
@@ -94,167 +123,282 @@ class AllSensorsReader:
             print(f"读取短整型数据时发生异常 (地址 {address}): {e}")
             return None
 
-    def read_telemetry_data(self):
-        """读取所有遥测数据"""
+    async def read_telemetry_data(self):
+        """读取所有遥测数据 (一次读取 100~111 寄存器，本地解析)，按 PARAM_ORDER 顺序返回元组"""
         if not self.connected: return None
+        try:
+            response = await self.client.read_input_registers(address=100, count=12, slave=self.slave_address)
+            if response.isError():
+                print(f"批量读取遥测寄存器错误: {response}，改为逐个读取")
+                return await self._read_telemetry_data_single()
+        except Exception as e:
+            print(f"批量读取遥测数据时发生异常: {e}，改为逐个读取")
+            return await self._read_telemetry_data_single()
+
+        regs = response.registers
+        tev_db, ultrasonic_db, uhf_db = _DB_BLOCK_FLOATS.unpack(_DB_BLOCK_WORDS.pack(*regs[2:8])) # 102-107
+        return (regs[0], tev_db, regs[9],        # 100, 102-103, 109
+                ultrasonic_db, regs[10],        # 104-105, 110
+                uhf_db, regs[11])               # 106-107, 111
+
+    @staticmethod
+    def _decode_float(registers):
+        """将两个寄存器解码为浮点数 (字节大端, 字序小端: 低位字在前)"""
+        low, high = registers
+        return _FLOAT_BE.unpack(_WORDS_BE.pack(high, low))[0]
+
+    async def _read_telemetry_data_single(self):
+        """逐个寄存器读取遥测数据 (批量读取失败时的后备方案)"""
         data = {}
         read_success = True
-        tev_count = self.read_short(100); data['TEV放电次数'] = tev_count if tev_count is not None else None; read_success &= (tev_count is not None)
-        # uhf_count = self.read_short(101); data['UHF放电次数'] = uhf_count if uhf_count is not None else None; read_success &= (uhf_count is not None)
-        tev_mv = self.read_short(109); data['TEV_mV值'] = tev_mv if tev_mv is not None else None; read_success &= (tev_mv is not None)
-        ultrasonic_mv = self.read_short(110); data['超声波_mV值'] = ultrasonic_mv if ultrasonic_mv is not None else None; read_success &= (ultrasonic_mv is not None)
-        uhf_mv = self.read_short(111); data['UHF_mV值'] = uhf_mv if uhf_mv is not None else None; read_success &= (uhf_mv is not None)
-        tev_db = self.read_float(102); data['TEV_dB值'] = tev_db if tev_db is not None else None; read_success &= (tev_db is not None)
-        ultrasonic_db = self.read_float(104); data['超声波_dB值'] = ultrasonic_db if ultrasonic_db is not None else None; read_success &= (ultrasonic_db is not None)
-        uhf_db = self.read_float(106); data['UHF_dB值'] = uhf_db if uhf_db is not None else None; read_success &= (uhf_db is not None)
+        tev_count = await self.read_short(100); data['TEV放电次数'] = tev_count if tev_count is not None else None; read_success &= (tev_count is not None)
+        # uhf_count = await self.read_short(101); data['UHF放电次数'] = uhf_count if uhf_count is not None else None; read_success &= (uhf_count is not None)
+        tev_mv = await self.read_short(109); data['TEV_mV值'] = tev_mv if tev_mv is not None else None; read_success &= (tev_mv is not None)
+        ultrasonic_mv = await self.read_short(110); data['超声波_mV值'] = ultrasonic_mv if ultrasonic_mv is not None else None; read_success &= (ultrasonic_mv is not None)
+        uhf_mv = await self.read_short(111); data['UHF_mV值'] = uhf_mv if uhf_mv is not None else None; read_success &= (uhf_mv is not None)
+        tev_db = await self.read_float(102); data['TEV_dB值'] = tev_db if tev_db is not None else None; read_success &= (tev_db is not None)
+        ultrasonic_db = await self.read_float(104); data['超声波_dB值'] = ultrasonic_db if ultrasonic_db is not None else None; read_success &= (ultrasonic_db is not None)
+        uhf_db = await self.read_float(106); data['UHF_dB值'] = uhf_db if uhf_db is not None else None; read_success &= (uhf_db is not None)
 
         if not read_success:
             print("警告：部分遥测数据读取失败")
-        return data
+        return tuple(data[key] for key in PARAM_ORDER)
 
-    def read_waveform_data(self, max_read_count=125):
-        """读取三种图谱数据"""
+    async def read_waveform_data(self, max_read_count=125):
+        """
+        读取三种图谱数据
+
+        三种图谱的寄存器 (2000~2383) 是连续的，整块按每次最多 max_read_count 个
+        寄存器 (Modbus 单次读取上限 125) 分段读取，共 4 次事务，而不是每种图谱各 2 次。
+        返回按 WAVEFORM_NAMES 顺序的列表，每项为 (3, 128) 数组的一行，未完整读到的图谱为空列表。
+        某一段读取失败时继续读取后面的段，只有包含失败段的图谱为空列表。
+        """
         if not self.connected: return None
-        waveforms = {}
-        read_success = True
-        waveform_info = {
-            'TEV图谱': {'start_address': 2000, 'registers_to_read': 128},
-            '超声波图谱': {'start_address': 2128, 'registers_to_read': 128},
-            'UHF图谱': {'start_address': 2256, 'registers_to_read': 128},
-        }
-        for name, info in waveform_info.items():
-            waveform_data = []
-            start_address = info['start_address']
-            registers_to_read = info['registers_to_read']
-            current_address = start_address
-            error_occurred = False
+        start_address = 2000
+        # 三种图谱放在同一个 (3, 128) uint16 数组中，每行是一种图谱，各段响应直接写入对应位置。
+        # 每次读取新建数组: 上一帧的行视图可能还在等待界面处理，不能原地覆盖
+        waveforms = np.empty((len(WAVEFORM_NAMES), WAVEFORM_POINTS), dtype=np.uint16)
+        block = waveforms.reshape(-1) # 同一内存的一维视图
+        failed = [False] * len(WAVEFORM_NAMES) # 各图谱是否有未读到的寄存器
+        for offset in range(0, block.size, max_read_count):
+            count = min(block.size - offset, max_read_count)
+            current_address = start_address + offset
             try:
-                while registers_to_read > 0:
-                    count = min(registers_to_read, max_read_count)
-                    response = self.client.read_input_registers(address=current_address, count=count, slave=self.slave_address)
-                    if response.isError():
-                        print(f"    读取 {name} 数据错误 (地址 {current_address}, 数量 {count}): {response}")
-                        error_occurred = True; break
-                    waveform_data.extend(response.registers)
-                    registers_to_read -= count
-                    current_address += count
-                    time.sleep(0.1) # 避免请求过于频繁
-                if not error_occurred:
-                    waveforms[name] = waveform_data
+                response = await self.client.read_input_registers(address=current_address, count=count, slave=self.slave_address)
+                if response.isError():
+                    print(f"    读取图谱数据错误 (地址 {current_address}, 数量 {count}): {response}")
                 else:
-                    waveforms[name] = []; read_success = False
+                    # 寄存器列表直接切片赋值即可一次完成转换; 先 np.asarray 或
+                    # 重新编码响应再 np.frombuffer 反而更慢
+                    block[offset:offset + count] = response.registers
+                    continue
             except Exception as e:
-                print(f"  读取 {name} 时发生异常: {e}")
-                waveforms[name] = []; read_success = False; break
-        if not read_success:
+                print(f"  读取图谱数据时发生异常 (地址 {current_address}): {e}")
+            # 一段可能跨两种图谱，两种都标记为失败
+            for i in range(offset // WAVEFORM_POINTS, (offset + count - 1) // WAVEFORM_POINTS + 1):
+                failed[i] = True
+
+        if any(failed):
             print("警告：部分图谱数据读取失败或发生异常")
-        return waveforms
-
-# --- Worker Threads ---
-# 工作线程基类
-class WorkerThread(QThread):
-    error_occurred = Signal(str)  # 错误信号
-    
-    def __init__(self, parent=None):
+        # 只有已完整读到的图谱才返回数据
+        return [[] if failed[i] else row for i, row in enumerate(waveforms)]
+
+# --- Worker Thread ---
+class SensorWorker(QThread):
+    """常驻的串口读取线程: 连接期间一直运行，按顺序执行任务队列中的串口任务
+
+    串口读写使用 pymodbus 异步客户端，由本线程自己的 asyncio 事件循环驱动。
+    """
+    connected = Signal(bool, str) # (是否连接成功, 串口名)
+    # 一次刷新的 (遥测数据, 图谱数据)，遥测为按 PARAM_ORDER 顺序的元组，图谱为
+    # 按 WAVEFORM_NAMES 顺序的列表。遥测读取失败时为 None；图谱中未完整读到的
+    # 行为空列表 (设备未连接时整个图谱数据为 None)
+    data_ready = Signal(object, object)
+    refresh_finished = Signal() # 一次刷新任务结束 (无论成功与否)
+    error_occurred = Signal(str)
+
+    def __init__(self, reader, parent=None):
         super().__init__(parent)
+        self.reader = reader
+        # 任务: 'connect' / 'refresh'，None 表示退出。界面在上一次刷新结束前
+        # 不会放入新的刷新任务，队列中不会积压任务
+        self.jobs = queue.Queue()
         self._running = True # 用于控制是否应发出信号
-        
-    def run(self):
-        # 子类应实现此方法
-        pass
 
     def stop(self):
+        """请求线程在当前任务完成后退出"""
         self._running = False
-        # QThread.quit() 或 QThread.terminate() 可用于更强制的停止
-        # 但通常最好是让 run() 方法自然结束
+        try:
+            self.jobs.get_nowait() # 丢弃尚未开始的任务
+        except queue.Empty:
+            pass
+        self.jobs.put(None)
 
-# 遥测数据工作线程
-class TelemetryWorker(WorkerThread):
-    data_ready = Signal(dict)
-    
-    def __init__(self, reader, parent=None):
-        super().__init__(parent)
-        self.reader = reader
-        
     def run(self):
+        loop = asyncio.new_event_loop()
         try:
-            if not self._running:
-                return # 如果在启动前就被stop了
-            if not self.reader or not self.reader.connected:
-                if self._running: self.error_occurred.emit("遥测数据读取: 设备未连接")
-                return
-
-            data = self.reader.read_telemetry_data()
-            
-            if self._running: # 再次检查，确保在耗时操作后仍然需要发送信号
-                if data is not None:
-                    self.data_ready.emit(data)
-                else:
-                    self.error_occurred.emit("读取遥测数据失败 (返回None)")
-        except Exception as e:
-            if self._running:
-                self.error_occurred.emit(f"遥测数据读取异常: {str(e)}")
-
-# 图谱数据工作线程
-class WaveformsWorker(WorkerThread):
-    data_ready = Signal(dict)
+            self._process_jobs(loop)
+        finally:
+            # 异步客户端绑定在本线程的事件循环上，串口也在这里关闭
+            if self.reader:
+                self.reader.disconnect()
+            loop.close()
+
+    def _process_jobs(self, loop):
+        """依次执行任务队列中的任务，直到收到退出请求"""
+        while True:
+            job = self.jobs.get()
+            if job is None or not self._running:
+                break
+            try:
+                if job == 'connect':
+                    # 打开串口可能耗时较长，放在工作线程中进行，界面不会卡住
+                    success = loop.run_until_complete(self.reader.connect())
+                    if self._running:
+                        self.connected.emit(success, self.reader.port)
+                    continue
+                if not self.reader or not self.reader.connected:
+                    self.error_occurred.emit("数据读取: 设备未连接")
+                    continue
+                if job == 'refresh':
+                    # 串口同一时刻只能进行一个事务: 遥测和图谱依次连续读取，
+                    # 读完后一次交给界面，界面只需刷新一次
+                    data = loop.run_until_complete(self.reader.read_telemetry_data())
+                    if not self._running: # 再次检查，确保在耗时操作后仍然需要继续
+                        break
+                    waveforms = loop.run_until_complete(self.reader.read_waveform_data())
+                    if self._running:
+                        if data is None:
+                            self.error_occurred.emit("读取遥测数据失败 (返回None)")
+                        if waveforms is None:
+                            self.error_occurred.emit("读取图谱数据失败 (返回None)")
+                        self.data_ready.emit(data, waveforms)
+            except Exception as e:
+                if self._running:
+                    self.error_occurred.emit(f"数据读取异常 ({job}): {str(e)}")
+            finally:
+                if job == 'refresh' and self._running:
+                    self.refresh_finished.emit()
 
-    def __init__(self, reader, parent=None):
-        super().__init__(parent)
-        self.reader = reader
+class PortScanner(QThread):
+    """在后台枚举串口 (部分 USB 转串口驱动枚举很慢，不能放在界面线程)"""
+    ports_ready = Signal(list)
 
     def run(self):
         try:
-            if not self._running:
-                return # 如果在启动前就被stop了
-            if not self.reader or not self.reader.connected:
-                if self._running: self.error_occurred.emit("图谱数据读取: 设备未连接")
-                return
-
-            waveforms = self.reader.read_waveform_data()
-
-            if self._running: # 再次检查
-                if waveforms is not None:
-                    self.data_ready.emit(waveforms)
-                else:
-                    self.error_occurred.emit("读取图谱数据失败 (返回None)")
+            ports = sorted(serial.tools.list_ports.comports())
         except Exception as e:
-            if self._running:
-                self.error_occurred.emit(f"图谱数据读取异常: {str(e)}")
+            print(f"枚举串口时发生异常: {e}")
+            ports = []
+        self.ports_ready.emit([(port, desc) for port, desc, hwid in ports])
 
 
 # --- Matplotlib Canvas Class (使用 PySide6) ---
-class MonitorCanvas(FigureCanvas):
-    """通用数据显示画布"""
-    def __init__(self, parent=None, width=5, height=2, dpi=100):
+class MultiWaveformCanvas(FigureCanvas):
+    """
+    三种图谱共用的数据显示画布
+
+    一个 Figure 中上下排列多个子图，共用一个渲染器和一个 Qt 控件。刷新时只重绘
+    曲线，坐标轴等静态背景通过 blit 复用，每次刷新只做一次 blit。
+    """
+    def __init__(self, titles, parent=None, width=5, height=6, dpi=100, gain=1.0, offset=0.0):
+        """
+        titles: 各子图的标题，决定子图个数和顺序
+        gain, offset: 寄存器原始值到显示幅值的换算，显示值 = 原始值 * gain + offset
+        """
+        configure_fonts()
         self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(MonitorCanvas, self).__init__(self.fig)
+        self.axes = self.fig.subplots(len(titles), 1, squeeze=False)[:, 0]
+        super(MultiWaveformCanvas, self).__init__(self.fig)
         self.setParent(parent)
-        self.init_plot("图谱数据")
-
-    def init_plot(self, title="图谱数据"):
-        """初始化图表"""
-        self.axes.clear()
-        self.axes.set_title(title)
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
+        self.titles = tuple(titles)
+        self.lines = []
+        for ax in self.axes:
+            ax.set_xlabel('采样点')
+            ax.set_ylabel('幅值')
+            ax.grid(True)
+            # 曲线设为 animated，完整重绘时不画进背景，由 blit 单独绘制
+            line, = ax.plot([], [], 'b-', animated=True)
+            self.lines.append(line)
+        self._y = [np.zeros(0, dtype=np.float32) for _ in self.titles]  # 换算后的显示数据缓冲区
+        self._raw = [np.zeros(0, dtype=np.uint16) for _ in self.titles] # 上次的寄存器原始值
+        self._count = [0] * len(self.titles) # 各曲线当前的点数
+        self.gain = gain
+        self.offset = offset
+        self.background = None
+        self.mpl_connect('draw_event', self._on_draw)
+        # 布局只与画布尺寸有关，创建和缩放时计算一次即可，不必每次初始化图表都重算
+        self.mpl_connect('resize_event', self._on_resize)
         self.fig.tight_layout()
-        self.draw()
+        self.init_plot()
 
-    def update_plot(self, data, title="图谱数据"):
-        """更新图表数据"""
-        self.axes.clear()
-        if data:
-             self.axes.plot(data, 'b-')
-        self.axes.set_title(title)
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
+    def _on_resize(self, event):
+        """画布尺寸变化后重新计算布局 (随后的完整重绘会更新背景缓存)"""
         self.fig.tight_layout()
+
+    def _on_draw(self, event):
+        """每次完整重绘 (包括窗口缩放) 后重新缓存背景并补画曲线"""
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+
+    def init_plot(self, suffix=""):
+        """初始化全部子图，suffix 附加在标题之后 (如 " (无数据)")"""
+        for i, (ax, line, title) in enumerate(zip(self.axes, self.lines, self.titles)):
+            line.set_data([], [])
+            self._count[i] = 0
+            ax.set_title(title + suffix)
         self.draw()
 
+    def update_plots(self, waveforms):
+        """更新全部子图，waveforms 与 titles 一一对应"""
+        changed = False
+        full_redraw = self.background is None
+        for i, (ax, line, title, data) in enumerate(zip(self.axes, self.lines, self.titles, waveforms)):
+            count = len(data)
+            if count > len(self._y[i]):
+                self._y[i] = np.zeros(count, dtype=np.float32)
+                self._raw[i] = np.zeros(count, dtype=np.uint16)
+            raw = self._raw[i][:count]
+            if (not store_if_changed(raw, data) and count == self._count[i]
+                    and title == ax.get_title()):
+                continue
+            changed = True
+            self._count[i] = count
+            y = self._y[i][:count]
+            if count:
+                scale_waveform(raw, self.gain, self.offset, y)
+            line.set_data(np.arange(count), y)
+            if title != ax.get_title():
+                ax.set_title(title)
+                full_redraw = True
+            if count and self._update_limits(ax, count, float(y.min()), float(y.max())):
+                full_redraw = True
+
+        if full_redraw:
+            # 标题或坐标范围变化时才完整重绘，背景在 _on_draw 中重新缓存
+            self.draw()
+        elif changed:
+            self.restore_region(self.background)
+            self._draw_lines()
+            self.blit(self.fig.bbox)
+
+    @staticmethod
+    def _update_limits(ax, count, low, high):
+        """数据超出当前范围或明显变小时调整坐标范围，返回是否调整"""
+        y_min, y_max = ax.get_ylim()
+        x_max = max(count - 1, 1)
+        margin = (high - low) * 0.05 or 1
+        if (ax.get_xlim() == (0, x_max) and y_min <= low and high <= y_max
+                and (y_max - y_min) <= 4 * (high - low + 2 * margin)):
+            return False
+        ax.set_xlim(0, x_max)
+        ax.set_ylim(low - margin, high + margin)
+        return True
+
 # --- 主应用窗口类 (使用 PySide6) ---
 class AllSensorsApp(QMainWindow):
     def __init__(self):
@@ -263,11 +407,21 @@ class AllSensorsApp(QMainWindow):
         self.setGeometry(100, 100, 1000, 700)
 
         self.reader = None
-        self.timer = QTimer(self) # 自动刷新定时器
+        # 自动刷新定时器为单次触发: 每次读取结束后才重新计时，读取比刷新间隔慢时
+        # 不会积压定时事件，刷新节奏自动放慢为 "读取耗时 + 间隔"
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.trigger_data_update) # 连接到触发更新的槽
+        self._interval_ms = 0 # 自动刷新间隔，0 表示手动刷新
+        self._refresh_in_flight = False # 已交给工作线程的刷新尚未结束
 
-        self.telemetry_worker = None
-        self.waveforms_worker = None
+        self.worker = None # 连接期间常驻的 SensorWorker
+        self._stopping_worker = None # 已请求退出、正在关闭串口的 SensorWorker
+        self._stopped_message = '' # 工作线程退出后显示的状态信息
+        self.port_scanner = None
+        self._ports_cache = None # (枚举时间, 串口列表)，短时间内重复刷新直接使用
+        self._shown_ports = None # 下拉框中当前显示的串口列表
 
         self.initUI()
         self.refresh_ports()
@@ -284,6 +438,10 @@ class AllSensorsApp(QMainWindow):
 
         self.port_combo = QComboBox()
         self.port_combo.setToolTip("选择设备连接的串口")
+        self.baud_combo = QComboBox()
+        self.baud_combo.setToolTip("选择串口波特率 (需与设备设置一致)")
+        for baud in BAUDRATES:
+            self.baud_combo.addItem(str(baud), baud)
         self.refresh_button = QPushButton("刷新串口")
         self.refresh_button.clicked.connect(self.refresh_ports) # PySide6 信号连接
         self.connect_button = QPushButton("连接")
@@ -294,6 +452,8 @@ class AllSensorsApp(QMainWindow):
 
         connection_layout.addWidget(QLabel("串口:"))
         connection_layout.addWidget(self.port_combo, 1)
+        connection_layout.addWidget(QLabel("波特率:"))
+        connection_layout.addWidget(self.baud_combo)
         connection_layout.addWidget(self.refresh_button)
         connection_layout.addWidget(self.connect_button)
         connection_layout.addWidget(self.disconnect_button)
@@ -317,12 +477,16 @@ class AllSensorsApp(QMainWindow):
         self.telemetry_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         self.telemetry_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers) # PySide6 枚举
 
-        param_names = ['TEV放电次数', 'TEV_dB值', 'TEV_mV值',
-                       '超声波_dB值', '超声波_mV值',
-                       'UHF_dB值', 'UHF_mV值']  # 移除'UHF放电次数'
-        for i, name in enumerate(param_names):
+        # 数值列的单元格只创建一次，刷新时直接 setText
+        self._value_items = [QTableWidgetItem('--') for _ in PARAM_ORDER]
+        # 每行的数据类型固定 (dB 值为浮点数，其余为整数)，按行预先选好格式化函数
+        self._formatters = [str, '{:.2f}'.format, str,
+                            '{:.2f}'.format, str,
+                            '{:.2f}'.format, str]
+        self._last_values = {} # 各行上次显示的值，未变化时不重新格式化和设置文本
+        for i, name in enumerate(PARAM_ORDER):
             self.telemetry_table.setItem(i, 0, QTableWidgetItem(name))
-            self.telemetry_table.setItem(i, 1, QTableWidgetItem('--'))
+            self.telemetry_table.setItem(i, 1, self._value_items[i])
 
         telemetry_layout.addWidget(self.telemetry_table)
         splitter.addWidget(telemetry_group)
@@ -332,17 +496,9 @@ class AllSensorsApp(QMainWindow):
         waveform_layout = QVBoxLayout()
         waveform_group.setLayout(waveform_layout)
 
-        self.tev_canvas = MonitorCanvas(self)
-        self.ultrasonic_canvas = MonitorCanvas(self)
-        self.uhf_canvas = MonitorCanvas(self)
-
-        self.tev_canvas.init_plot("TEV图谱")
-        self.ultrasonic_canvas.init_plot("超声波图谱")
-        self.uhf_canvas.init_plot("UHF图谱")
-
-        waveform_layout.addWidget(self.tev_canvas)
-        waveform_layout.addWidget(self.ultrasonic_canvas)
-        waveform_layout.addWidget(self.uhf_canvas)
+        # 三种图谱画在同一个画布的三个子图中，顺序与读取结果一致
+        self.waveform_canvas = MultiWaveformCanvas(WAVEFORM_NAMES, self)
+        waveform_layout.addWidget(self.waveform_canvas)
         splitter.addWidget(waveform_group)
 
         splitter.setSizes([300, 700])
@@ -372,18 +528,42 @@ class AllSensorsApp(QMainWindow):
 
     @Slot() # 明确标记为槽函数 (可选，但推荐)
     def refresh_ports(self):
-        """刷新可用串口列表"""
-        self.port_combo.clear()
-        ports = serial.tools.list_ports.comports()
-        if not ports:
-            self.port_combo.addItem("未找到串口")
-            self.port_combo.setEnabled(False)
-            self.connect_button.setEnabled(False)
-        else:
-            for port, desc, hwid in sorted(ports):
-                self.port_combo.addItem(f"{port} - {desc}", port)
-            self.port_combo.setEnabled(True)
-            self.connect_button.setEnabled(True)
+        """刷新可用串口列表 (在后台线程中枚举，500 毫秒内的重复刷新直接使用上次结果)"""
+        if self._ports_cache and time.monotonic() - self._ports_cache[0] < 0.5:
+            self._show_ports(self._ports_cache[1])
+            return
+        if self.port_scanner and self.port_scanner.isRunning():
+            return # 上一次枚举尚未完成
+        self.statusBar().showMessage('正在刷新串口列表...')
+        self.port_scanner = PortScanner(self)
+        self.port_scanner.ports_ready.connect(self._handle_ports_ready)
+        self.port_scanner.start()
+
+    @Slot(list)
+    def _handle_ports_ready(self, ports):
+        """处理后台线程枚举到的串口列表"""
+        self._ports_cache = (time.monotonic(), ports)
+        if not self.worker and not self._stopping_worker: # 已连接或正在断开时不改动串口选择
+            self._show_ports(ports)
+
+    def _show_ports(self, ports):
+        """把串口列表填入下拉框 (列表未变化时不重建，重建后保留原来选中的串口)"""
+        if ports != self._shown_ports:
+            self._shown_ports = ports
+            current_port = self.port_combo.currentData()
+            self.port_combo.clear()
+            if not ports:
+                self.port_combo.addItem("未找到串口")
+                self.port_combo.setEnabled(False)
+                self.connect_button.setEnabled(False)
+            else:
+                for port, desc in ports:
+                    self.port_combo.addItem(f"{port} - {desc}", port)
+                index = self.port_combo.findData(current_port)
+                if index >= 0:
+                    self.port_combo.setCurrentIndex(index)
+                self.port_combo.setEnabled(True)
+                self.connect_button.setEnabled(True)
         self.statusBar().showMessage('串口列表已刷新')
 
     @Slot()
@@ -395,664 +575,105 @@ class AllSensorsApp(QMainWindow):
              return
 
         port_name = self.port_combo.itemData(selected_index)
-        self.statusBar().showMessage(f'正在连接 {port_name}...')
-        QApplication.processEvents()
 
-        if self.reader and self.reader.connected:
+        if self._stopping_worker:
+            self.statusBar().showMessage('正在关闭上一个连接，请稍候...')
+            return
+        if self.worker:
             self.disconnect_device() # 会停止现有线程
 
-        self.reader = AllSensorsReader(port_name)
-        if self.reader.connect():
+        self.statusBar().showMessage(f'正在连接 {port_name}...')
+        self.connect_button.setEnabled(False) # 连接结果返回前不允许重复连接
+        self.reader = AllSensorsReader(port_name, baudrate=self.baud_combo.currentData())
+        self.worker = SensorWorker(self.reader)
+        self.worker.connected.connect(self._handle_connected)
+        self.worker.data_ready.connect(self._handle_sensor_data)
+        self.worker.refresh_finished.connect(self._handle_refresh_finished)
+        self.worker.error_occurred.connect(self._handle_worker_error)
+        self.worker.finished.connect(self._handle_worker_finished)
+        self.worker.start()
+        self.worker.jobs.put('connect')
+
+    @Slot(bool, str)
+    def _handle_connected(self, success, port_name):
+        """处理工作线程返回的连接结果"""
+        if not self.worker:
+            return # 连接过程中已经断开
+        if success:
             self.statusBar().showMessage(f'成功连接到 {port_name}')
             self.connect_button.setEnabled(False)
             self.disconnect_button.setEnabled(True)
             self.port_combo.setEnabled(False)
+            self.baud_combo.setEnabled(False)
             self.refresh_button.setEnabled(False)
             self.manual_refresh_button.setEnabled(True)
-            self.set_auto_refresh(self.auto_refresh_combo.currentIndex()) # 启动定时器或首次更新
             self.trigger_data_update() # 首次连接后立即更新一次数据
+            # 首次读取已在进行，这里只记录刷新间隔，读取结束后才开始计时
+            self.set_auto_refresh(self.auto_refresh_combo.currentIndex())
         else:
+            self._stop_worker('连接失败')
             QMessageBox.critical(self, "连接失败", f"无法连接到 {port_name}。\n请检查设备是否连接或被占用。")
-            self.statusBar().showMessage('连接失败')
-            self.reader = None
 
     @Slot()
     def disconnect_device(self):
         """断开设备连接"""
         self.timer.stop() # 停止自动刷新
+        self._refresh_in_flight = False
 
-        if self.telemetry_worker and self.telemetry_worker.isRunning():
-            self.telemetry_worker.stop()
-            # self.telemetry_worker.wait() # 确保线程结束
-        self.telemetry_worker = None
-
-        if self.waveforms_worker and self.waveforms_worker.isRunning():
-            self.waveforms_worker.stop()
-            # self.waveforms_worker.wait() # 确保线程结束
-        self.waveforms_worker = None
-
-        if self.reader and self.reader.connected:
-            self.reader.disconnect()
-            self.statusBar().showMessage('设备已断开')
+        was_connected = self.reader is not None and self.reader.connected
+        if self.worker:
+            self._stop_worker('设备已断开' if was_connected else '设备未连接或已断开')
+            self.statusBar().showMessage('正在断开连接...')
         else:
             self.statusBar().showMessage('设备未连接或已断开')
-
-        self.connect_button.setEnabled(True)
-        self.disconnect_button.setEnabled(False)
-        self.port_combo.setEnabled(True)
-        self.refresh_button.setEnabled(True)
-        self.manual_refresh_button.setEnabled(False)
-        self.reader = None # 清理reader实例
         self.clear_display()
 
-    @Slot(int) # 明确参数类型
-    def set_auto_refresh(self, index):
-        """设置自动刷新间隔"""
-        self.timer.stop()
-        if index == 0: # 手动刷新
-            self.statusBar().showMessage('自动刷新已关闭. 请使用手动刷新.')
-            # 手动刷新模式下，不启动定时器
-        else:
-            intervals = [1000, 2000, 5000, 10000]
-            interval = intervals[index - 1]
-            if self.reader and self.reader.connected:
-                self.timer.start(interval)
-                self.statusBar().showMessage(f'自动刷新间隔: {interval/1000} 秒')
-            else:
-                 self.statusBar().showMessage('请先连接设备以启动自动刷新')
-
-    @Slot()
-    def trigger_data_update(self):
-        """触发遥测和图谱数据的异步更新"""
-        if not self.reader or not self.reader.connected:
-            if self.timer.isActive():
-                self.timer.stop()
-                self.auto_refresh_combo.setCurrentIndex(0) # 回到手动刷新
-                QMessageBox.warning(self, "连接断开", "设备连接已断开，自动刷新已停止。")
-            self.statusBar().showMessage('设备未连接，无法更新数据')
-            return
-
-        self.statusBar().showMessage('准备读取数据...') # 更新状态提示
-        QApplication.processEvents() # 允许UI更新
-
-        # --- 启动遥测数据读取线程 ---
-        if not self.telemetry_worker or not self.telemetry_worker.isRunning():
-            self.telemetry_worker = TelemetryWorker(self.reader)
-            self.telemetry_worker.data_ready.connect(self._handle_telemetry_data)
-            self.telemetry_worker.error_occurred.connect(self._handle_worker_error)
-            self.telemetry_worker.finished.connect(self._cleanup_telemetry_worker) # QThread.finished
-            self.telemetry_worker.start()
-        else:
-            print("遥测数据线程已在运行")
-
-        # --- 启动图谱数据读取线程 ---
-        if not self.waveforms_worker or not self.waveforms_worker.isRunning():
-            self.waveforms_worker = WaveformsWorker(self.reader)
-            self.waveforms_worker.data_ready.connect(self._handle_waveforms_data)
-            self.waveforms_worker.error_occurred.connect(self._handle_worker_error)
-            self.waveforms_worker.finished.connect(self._cleanup_waveforms_worker) # QThread.finished
-            self.waveforms_worker.start()
-        else:
-            print("图谱数据线程已在运行")
-
-    # Slot to handle telemetry data from worker
-    @Slot(dict)
-    def _handle_telemetry_data(self, telemetry_data):
-        """处理从工作线程接收到的遥测数据"""
-        if telemetry_data:
-            param_map = {
-                'TEV放电次数': 0, 'TEV_dB值': 1, 'TEV_mV值': 2,
-                '超声波_dB值': 3, '超声波_mV值': 4,
-                'UHF_dB值': 5, 'UHF_mV值': 6
-            }
-            for key, value in telemetry_data.items():
-                row = param_map.get(key)
-                if row is not None:
-                    display_value = '--'
-                    if value is not None:
-                        if isinstance(value, float):
-                            display_value = f"{value:.2f}"
-                        else:
-                            display_value = str(value)
-                    self.telemetry_table.setItem(row, 1, QTableWidgetItem(display_value))
-            self.statusBar().showMessage('遥测数据已更新 ' + time.strftime('%H:%M:%S'))
-        else:
-            print("接收到空的遥测数据")
-            # Optionally update table to show '读取失败' for telemetry
-            for i in range(self.telemetry_table.rowCount()):
-                 self.telemetry_table.setItem(i, 1, QTableWidgetItem('无数据'))
-
-    # Slot to handle waveform data from worker
-    @Slot(dict)
-    def _handle_waveforms_data(self, waveform_data_dict):
-        """处理从工作线程接收到的图谱数据"""
-        if waveform_data_dict:
-            self.tev_canvas.update_plot(waveform_data_dict.get('TEV图谱', []), "TEV图谱")
-            self.ultrasonic_canvas.update_plot(waveform_data_dict.get('超声波图谱', []), "超声波图谱")
-            self.uhf_canvas.update_plot(waveform_data_dict.get('UHF图谱', []), "UHF图谱")
-            self.statusBar().showMessage('图谱数据已更新 ' + time.strftime('%H:%M:%S'))
-        else:
-            print("接收到空的图谱数据")
-            self.tev_canvas.init_plot("TEV图谱 (无数据)")
-            self.ultrasonic_canvas.init_plot("超声波图谱 (无数据)")
-            self.uhf_canvas.init_plot("UHF图谱 (无数据)")
-
-    # Slot to handle errors from workers
-    @Slot(str)
-    def _handle_worker_error(self, error_message):
-        """处理工作线程发送的错误信息"""
-        print(f"工作线程错误: {error_message}")
-        self.statusBar().showMessage(f'错误: {error_message}')
-        # Optionally, update specific parts of UI to indicate failure for that data type
-
-    @Slot()
-    def _cleanup_telemetry_worker(self):
-        # print("遥测工作线程完成")
-        if self.telemetry_worker:
-            self.telemetry_worker.deleteLater() # Schedule for deletion
-        self.telemetry_worker = None
-
-    @Slot()
-    def _cleanup_waveforms_worker(self):
-        # print("图谱工作线程完成")
-        if self.waveforms_worker:
-            self.waveforms_worker.deleteLater() # Schedule for deletion
-        self.waveforms_worker = None
-
-    def update_data(self):
-        """原有的 update_data，现在改为 trigger_data_update"""
-        self.trigger_data_update()
-
-    def clear_display(self):
-         """清空数据显示区域"""
-         for i in range(self.telemetry_table.rowCount()):
-             self.telemetry_table.setItem(i, 1, QTableWidgetItem('--'))
-         self.tev_canvas.init_plot("TEV图谱")
-         self.ultrasonic_canvas.init_plot("超声波图谱")
-         self.uhf_canvas.init_plot("UHF图谱")
-
-    def closeEvent(self, event):
-        """关闭窗口前确保断开连接并停止线程"""
-        self.disconnect_device() # disconnect_device 现在会处理线程停止
-        event.accept()
-
-# --- Worker Threads ---
-class WorkerThread(QThread):
-    """工作线程基类"""
-    error_occurred = Signal(str)  # 错误信号
-    # finished_with_data = Signal() # 用于通知数据处理完成，可以清理worker -> 移除，使用QThread.finished
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-
-    def run(self):
-        try:
-            if not self.reader or not self.reader.connected:
-                if self._is_running: self.error_occurred.emit("遥测读取: 设备未连接")
-                return
-            telemetry_data = self.reader.read_telemetry_data()
-            if self._is_running:
-                if telemetry_data:
-                    self.data_ready.emit(telemetry_data)
-                else:
-                    self.error_occurred.emit("读取遥测数据失败或无数据")
-        except Exception as e:
-            if self._is_running: self.error_occurred.emit(f"遥测数据读取异常: {str(e)}")
-        # finally:
-            # if self._is_running: self.finished_with_data.emit() # -> 移除
-
-class WaveformsWorker(WorkerThread):
-    def run(self):
-        try:
-            if not self.reader or not self.reader.connected:
-                if self._is_running: self.error_occurred.emit("图谱读取: 设备未连接")
-                return
-            waveform_data = self.reader.read_waveform_data()
-            if self._is_running:
-                if waveform_data:
-                    self.data_ready.emit(waveform_data)
-                else:
-                    self.error_occurred.emit("读取图谱数据失败或无数据")
-        except Exception as e:
-            if self._is_running: self.error_occurred.emit(f"图谱数据读取异常: {str(e)}")
-        # finally:
-            # if self._is_running: self.finished_with_data.emit() # -> 移除
-
-class AllSensorsReader:
-    """读取 TEV, 超声波, UHF 传感器数据的类 (与GUI框架无关)"""
-
-    def __init__(self, port, slave_address=1):
+    def _stop_worker(self, message):
         """
-        初始化监测装置连接
+        请求工作线程退出，不在界面线程等待
 
-        参数:
-            port: 串口名称，如 'COM1'
-            slave_address: 从站地址，默认为1
+        正在进行的读取可能因超时持续数秒，工作线程完成当前任务、关闭串口后退出，
+        由 _handle_worker_finished 恢复连接控件并显示 message。
         """
-        self.port = port
-        self.client = ModbusSerialClient(
-            port=port,
-            baudrate=9600,
-            bytesize=8,
-            parity='N',
-            stopbits=1,
-            timeout=1
-        )
-        self.slave_address = slave_address
-        self.connected = False
-
-    def connect(self):
-        """建立与设备的连接"""
-        try:
-            self.connected = self.client.connect()
-        except Exception as e:
-            print(f"连接时发生错误: {e}")
-            self.connected = False
-        return self.connected
-
-    def disconnect(self):
-        """断开与设备的连接"""
-        if self.connected:
-            try:
-                self.client.close()
-                self.connected = False
-            except Exception as e:
-                print(f"断开连接时发生错误: {e}")
-
-    def read_float(self, address):
-        """读取浮点型数据"""
-        if not self.connected: return None
-        try:
-            response = self.client.read_input_registers(address=address, count=2, slave=self.slave_address)
-            if response.isError():
-                print(f"读取寄存器 {address} (float) 错误: {response}")
-                return None
-            decoder = BinaryPayloadDecoder.fromRegisters(
-                response.registers,
-                byteorder=Endian.BIG,
-                wordorder=Endian.LITTLE
-            )
-            return decoder.decode_32bit_float()
-        except Exception as e:
-            print(f"读取浮点数据时发生异常 (地址 {address}): {e}")
-            return None
-
-    def read_short(self, address):
-        """读取短整型数据"""
-        if not self.connected: return None
-        try:
-            response = self.client.read_input_registers(address=address, count=1, slave=self.slave_address)
-            if response.isError():
-                print(f"读取寄存器 {address} (short) 错误: {response}")
-                return None
-            return response.registers[0]
-        except Exception as e:
-            print(f"读取短整型数据时发生异常 (地址 {address}): {e}")
-            return None
-
-    def read_telemetry_data(self):
-        """读取所有遥测数据"""
-        if not self.connected: return None
-        data = {}
-        read_success = True
-        tev_count = self.read_short(100); data['TEV放电次数'] = tev_count if tev_count is not None else None; read_success &= (tev_count is not None)
-        # uhf_count = self.read_short(101); data['UHF放电次数'] = uhf_count if uhf_count is not None else None; read_success &= (uhf_count is not None)
-        tev_mv = self.read_short(109); data['TEV_mV值'] = tev_mv if tev_mv is not None else None; read_success &= (tev_mv is not None)
-        ultrasonic_mv = self.read_short(110); data['超声波_mV值'] = ultrasonic_mv if ultrasonic_mv is not None else None; read_success &= (ultrasonic_mv is not None)
-        uhf_mv = self.read_short(111); data['UHF_mV值'] = uhf_mv if uhf_mv is not None else None; read_success &= (uhf_mv is not None)
-        tev_db = self.read_float(102); data['TEV_dB值'] = tev_db if tev_db is not None else None; read_success &= (tev_db is not None)
-        ultrasonic_db = self.read_float(104); data['超声波_dB值'] = ultrasonic_db if ultrasonic_db is not None else None; read_success &= (ultrasonic_db is not None)
-        uhf_db = self.read_float(106); data['UHF_dB值'] = uhf_db if uhf_db is not None else None; read_success &= (uhf_db is not None)
-
-        if not read_success:
-            print("警告：部分遥测数据读取失败")
-        return data
-
-    def read_waveform_data(self, max_read_count=125):
-        """读取三种图谱数据"""
-        if not self.connected: return None
-        waveforms = {}
-        read_success = True
-        waveform_info = {
-            'TEV图谱': {'start_address': 2000, 'registers_to_read': 128},
-            '超声波图谱': {'start_address': 2128, 'registers_to_read': 128},
-            'UHF图谱': {'start_address': 2256, 'registers_to_read': 128},
-        }
-        for name, info in waveform_info.items():
-            waveform_data = []
-            start_address = info['start_address']
-            registers_to_read = info['registers_to_read']
-            current_address = start_address
-            error_occurred = False
-            try:
-                while registers_to_read > 0:
-                    count = min(registers_to_read, max_read_count)
-                    response = self.client.read_input_registers(address=current_address, count=count, slave=self.slave_address)
-                    if response.isError():
-                        print(f"    读取 {name} 数据错误 (地址 {current_address}, 数量 {count}): {response}")
-                        error_occurred = True; break
-                    waveform_data.extend(response.registers)
-                    registers_to_read -= count
-                    current_address += count
-                    time.sleep(0.1) # 避免请求过于频繁
-                if not error_occurred:
-                    waveforms[name] = waveform_data
-                else:
-                    waveforms[name] = []; read_success = False
-            except Exception as e:
-                print(f"  读取 {name} 时发生异常: {e}")
-                waveforms[name] = []; read_success = False; break
-        if not read_success:
-            print("警告：部分图谱数据读取失败或发生异常")
-        return waveforms
-
-# --- Worker Threads ---
-# 工作线程基类
-class WorkerThread(QThread):
-    error_occurred = Signal(str)  # 错误信号
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self._running = True # 用于控制是否应发出信号
-        
-    def run(self):
-        # 子类应实现此方法
-        pass
-
-    def stop(self):
-        self._running = False
-        # QThread.quit() 或 QThread.terminate() 可用于更强制的停止
-        # 但通常最好是让 run() 方法自然结束
-
-# 遥测数据工作线程
-class TelemetryWorker(WorkerThread):
-    data_ready = Signal(dict)
-    
-    def __init__(self, reader, parent=None):
-        super().__init__(parent)
-        self.reader = reader
-        
-    def run(self):
-        try:
-            if not self._running:
-                return # 如果在启动前就被stop了
-            if not self.reader or not self.reader.connected:
-                if self._running: self.error_occurred.emit("遥测数据读取: 设备未连接")
-                return
-
-            data = self.reader.read_telemetry_data()
-            
-            if self._running: # 再次检查，确保在耗时操作后仍然需要发送信号
-                if data is not None:
-                    self.data_ready.emit(data)
-                else:
-                    self.error_occurred.emit("读取遥测数据失败 (返回None)")
-        except Exception as e:
-            if self._running:
-                self.error_occurred.emit(f"遥测数据读取异常: {str(e)}")
-
-# 图谱数据工作线程
-class WaveformsWorker(WorkerThread):
-    data_ready = Signal(dict)
-
-    def __init__(self, reader, parent=None):
-        super().__init__(parent)
-        self.reader = reader
-
-    def run(self):
-        try:
-            if not self._running:
-                return # 如果在启动前就被stop了
-            if not self.reader or not self.reader.connected:
-                if self._running: self.error_occurred.emit("图谱数据读取: 设备未连接")
-                return
-
-            waveforms = self.reader.read_waveform_data()
-
-            if self._running: # 再次检查
-                if waveforms is not None:
-                    self.data_ready.emit(waveforms)
-                else:
-                    self.error_occurred.emit("读取图谱数据失败 (返回None)")
-        except Exception as e:
-            if self._running:
-                self.error_occurred.emit(f"图谱数据读取异常: {str(e)}")
-
-
-# --- Matplotlib Canvas Class (使用 PySide6) ---
-class MonitorCanvas(FigureCanvas):
-    """通用数据显示画布"""
-    def __init__(self, parent=None, width=5, height=2, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(MonitorCanvas, self).__init__(self.fig)
-        self.setParent(parent)
-        self.init_plot("图谱数据")
-
-    def init_plot(self, title="图谱数据"):
-        """初始化图表"""
-        self.axes.clear()
-        self.axes.set_title(title)
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
-        self.fig.tight_layout()
-        self.draw()
-
-    def update_plot(self, data, title="图谱数据"):
-        """更新图表数据"""
-        self.axes.clear()
-        if data:
-             self.axes.plot(data, 'b-')
-        self.axes.set_title(title)
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
-        self.fig.tight_layout()
-        self.draw()
-
-# --- 主应用窗口类 (使用 PySide6) ---
-class AllSensorsApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle('GP-开关柜多传感器监测软件 (PySide6 - 多线程)')
-        self.setGeometry(100, 100, 1000, 700)
-
+        self.worker.stop()
+        self._stopping_worker = self.worker
+        self._stopped_message = message
+        self.worker = None
         self.reader = None
-        self.timer = QTimer(self) # 自动刷新定时器
-        self.timer.timeout.connect(self.trigger_data_update) # 连接到触发更新的槽
-
-        self.telemetry_worker = None
-        self.waveforms_worker = None
-
-        self.initUI()
-        self.refresh_ports()
-
-    def initUI(self):
-        main_widget = QWidget()
-        self.setCentralWidget(main_widget)
-        main_layout = QVBoxLayout(main_widget)
-
-        # --- 连接控制区 ---
-        connection_group = QGroupBox("连接设置")
-        connection_layout = QHBoxLayout()
-        connection_group.setLayout(connection_layout)
-
-        self.port_combo = QComboBox()
-        self.port_combo.setToolTip("选择设备连接的串口")
-        self.refresh_button = QPushButton("刷新串口")
-        self.refresh_button.clicked.connect(self.refresh_ports) # PySide6 信号连接
-        self.connect_button = QPushButton("连接")
-        self.connect_button.clicked.connect(self.connect_device) # PySide6 信号连接
-        self.disconnect_button = QPushButton("断开")
-        self.disconnect_button.clicked.connect(self.disconnect_device) # PySide6 信号连接
+        # 串口关闭前不允许重新连接
+        self.connect_button.setEnabled(False)
         self.disconnect_button.setEnabled(False)
-
-        connection_layout.addWidget(QLabel("串口:"))
-        connection_layout.addWidget(self.port_combo, 1)
-        connection_layout.addWidget(self.refresh_button)
-        connection_layout.addWidget(self.connect_button)
-        connection_layout.addWidget(self.disconnect_button)
-
-        # --- 数据显示区 (使用 QSplitter) ---
-        # PySide6 使用 Qt.Orientation.Horizontal
-        splitter = QSplitter(Qt.Orientation.Horizontal)
-
-        # --- 遥测数据显示区 ---
-        telemetry_group = QGroupBox("遥测数据")
-        telemetry_layout = QVBoxLayout()
-        telemetry_group.setLayout(telemetry_layout)
-
-        self.telemetry_table = QTableWidget()
-        self.telemetry_table.setRowCount(7)  # 从8行改为7行，移除UHF放电次数
-        self.telemetry_table.setColumnCount(2)
-        self.telemetry_table.setHorizontalHeaderLabels(['参数', '值'])
-        self.telemetry_table.verticalHeader().setVisible(False)
-        # PySide6 中调整大小模式的设置方式
-        self.telemetry_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.telemetry_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.telemetry_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers) # PySide6 枚举
-
-        param_names = ['TEV放电次数', 'TEV_dB值', 'TEV_mV值',
-                       '超声波_dB值', '超声波_mV值',
-                       'UHF_dB值', 'UHF_mV值']  # 移除'UHF放电次数'
-        for i, name in enumerate(param_names):
-            self.telemetry_table.setItem(i, 0, QTableWidgetItem(name))
-            self.telemetry_table.setItem(i, 1, QTableWidgetItem('--'))
-
-        telemetry_layout.addWidget(self.telemetry_table)
-        splitter.addWidget(telemetry_group)
-
-        # --- 图谱显示区 ---
-        waveform_group = QGroupBox("图谱数据")
-        waveform_layout = QVBoxLayout()
-        waveform_group.setLayout(waveform_layout)
-
-        self.tev_canvas = MonitorCanvas(self)
-        self.ultrasonic_canvas = MonitorCanvas(self)
-        self.uhf_canvas = MonitorCanvas(self)
-
-        self.tev_canvas.init_plot("TEV图谱")
-        self.ultrasonic_canvas.init_plot("超声波图谱")
-        self.uhf_canvas.init_plot("UHF图谱")
-
-        waveform_layout.addWidget(self.tev_canvas)
-        waveform_layout.addWidget(self.ultrasonic_canvas)
-        waveform_layout.addWidget(self.uhf_canvas)
-        splitter.addWidget(waveform_group)
-
-        splitter.setSizes([300, 700])
-
-        # --- 自动刷新控制 ---
-        refresh_control_layout = QHBoxLayout()
-        self.auto_refresh_combo = QComboBox()
-        self.auto_refresh_combo.addItems(['手动刷新', '1秒', '2秒', '5秒', '10秒'])
-        self.auto_refresh_combo.setCurrentIndex(3) # 默认设置为5秒
-        self.auto_refresh_combo.currentIndexChanged.connect(self.set_auto_refresh) # PySide6 信号连接
-        self.manual_refresh_button = QPushButton("手动刷新数据")
-        self.manual_refresh_button.clicked.connect(self.trigger_data_update) # PySide6 信号连接, 改为 trigger_data_update
         self.manual_refresh_button.setEnabled(False)
 
-        refresh_control_layout.addWidget(QLabel("自动刷新:"))
-        refresh_control_layout.addWidget(self.auto_refresh_combo)
-        refresh_control_layout.addWidget(self.manual_refresh_button)
-        refresh_control_layout.addStretch()
-
-        # --- 布局整合 ---
-        main_layout.addWidget(connection_group)
-        main_layout.addWidget(splitter, 1)
-        main_layout.addLayout(refresh_control_layout)
-
-        # --- 状态栏 ---
-        self.statusBar().showMessage('准备就绪')
-
-    @Slot() # 明确标记为槽函数 (可选，但推荐)
-    def refresh_ports(self):
-        """刷新可用串口列表"""
-        self.port_combo.clear()
-        ports = serial.tools.list_ports.comports()
-        if not ports:
-            self.port_combo.addItem("未找到串口")
-            self.port_combo.setEnabled(False)
-            self.connect_button.setEnabled(False)
-        else:
-            for port, desc, hwid in sorted(ports):
-                self.port_combo.addItem(f"{port} - {desc}", port)
-            self.port_combo.setEnabled(True)
-            self.connect_button.setEnabled(True)
-        self.statusBar().showMessage('串口列表已刷新')
-
-    @Slot()
-    def connect_device(self):
-        """连接到选定的设备"""
-        selected_index = self.port_combo.currentIndex()
-        if selected_index == -1 or not self.port_combo.itemData(selected_index):
-             QMessageBox.warning(self, "连接错误", "请选择一个有效的串口")
-             return
-
-        port_name = self.port_combo.itemData(selected_index)
-        self.statusBar().showMessage(f'正在连接 {port_name}...')
-        QApplication.processEvents()
-
-        if self.reader and self.reader.connected:
-            self.disconnect_device() # 会停止现有线程
-
-        self.reader = AllSensorsReader(port_name)
-        if self.reader.connect():
-            self.statusBar().showMessage(f'成功连接到 {port_name}')
-            self.connect_button.setEnabled(False)
-            self.disconnect_button.setEnabled(True)
-            self.port_combo.setEnabled(False)
-            self.refresh_button.setEnabled(False)
-            self.manual_refresh_button.setEnabled(True)
-            self.set_auto_refresh(self.auto_refresh_combo.currentIndex()) # 启动定时器或首次更新
-            self.trigger_data_update() # 首次连接后立即更新一次数据
-        else:
-            QMessageBox.critical(self, "连接失败", f"无法连接到 {port_name}。\n请检查设备是否连接或被占用。")
-            self.statusBar().showMessage('连接失败')
-            self.reader = None
-
     @Slot()
-    def disconnect_device(self):
-        """断开设备连接"""
-        self.timer.stop() # 停止自动刷新
-
-        if self.telemetry_worker and self.telemetry_worker.isRunning():
-            self.telemetry_worker.stop()
-            # self.telemetry_worker.wait() # 确保线程结束
-        self.telemetry_worker = None
-
-        if self.waveforms_worker and self.waveforms_worker.isRunning():
-            self.waveforms_worker.stop()
-            # self.waveforms_worker.wait() # 确保线程结束
-        self.waveforms_worker = None
-
-        if self.reader and self.reader.connected:
-            self.reader.disconnect()
-            self.statusBar().showMessage('设备已断开')
-        else:
-            self.statusBar().showMessage('设备未连接或已断开')
-
-        self.connect_button.setEnabled(True)
-        self.disconnect_button.setEnabled(False)
-        self.port_combo.setEnabled(True)
+    def _handle_worker_finished(self):
+        """工作线程已退出 (串口已关闭)，恢复连接控件"""
+        if self._stopping_worker is None:
+            return
+        self._stopping_worker.wait() # finished 发出后线程随即结束，这里不会阻塞
+        self._stopping_worker = None
+        self.connect_button.setEnabled(self.port_combo.currentData() is not None)
+        self.port_combo.setEnabled(self.port_combo.currentData() is not None)
+        self.baud_combo.setEnabled(True)
         self.refresh_button.setEnabled(True)
-        self.manual_refresh_button.setEnabled(False)
-        self.reader = None # 清理reader实例
-        self.clear_display()
+        self.statusBar().showMessage(self._stopped_message)
 
     @Slot(int) # 明确参数类型
     def set_auto_refresh(self, index):
         """设置自动刷新间隔"""
         self.timer.stop()
         if index == 0: # 手动刷新
+            self._interval_ms = 0
             self.statusBar().showMessage('自动刷新已关闭. 请使用手动刷新.')
             # 手动刷新模式下，不启动定时器
         else:
             intervals = [1000, 2000, 5000, 10000]
             interval = intervals[index - 1]
+            self._interval_ms = interval
             if self.reader and self.reader.connected:
-                self.timer.start(interval)
+                # 读取进行中时只记录间隔，由 _handle_refresh_finished 在读取结束后开始计时
+                if not self._refresh_in_flight:
+                    self.timer.start(interval)
                 self.statusBar().showMessage(f'自动刷新间隔: {interval/1000} 秒')
             else:
                  self.statusBar().showMessage('请先连接设备以启动自动刷新')
@@ -1061,77 +682,73 @@ class AllSensorsApp(QMainWindow):
     def trigger_data_update(self):
         """触发遥测和图谱数据的异步更新"""
         if not self.reader or not self.reader.connected:
-            if self.timer.isActive():
+            if self._interval_ms:
                 self.timer.stop()
                 self.auto_refresh_combo.setCurrentIndex(0) # 回到手动刷新
                 QMessageBox.warning(self, "连接断开", "设备连接已断开，自动刷新已停止。")
             self.statusBar().showMessage('设备未连接，无法更新数据')
             return
 
-        self.statusBar().showMessage('准备读取数据...') # 更新状态提示
-        QApplication.processEvents() # 允许UI更新
+        if self._refresh_in_flight:
+            # 上一次读取尚未结束，不再排队新的读取
+            self.statusBar().showMessage('跳过本次刷新: 上次读取尚未完成，可考虑降低刷新频率')
+            return
 
-        # --- 启动遥测数据读取线程 ---
-        if not self.telemetry_worker or not self.telemetry_worker.isRunning():
-            self.telemetry_worker = TelemetryWorker(self.reader)
-            self.telemetry_worker.data_ready.connect(self._handle_telemetry_data)
-            self.telemetry_worker.error_occurred.connect(self._handle_worker_error)
-            self.telemetry_worker.finished.connect(self._cleanup_telemetry_worker) # QThread.finished
-            self.telemetry_worker.start()
-        else:
-            print("遥测数据线程已在运行")
-
-        # --- 启动图谱数据读取线程 ---
-        if not self.waveforms_worker or not self.waveforms_worker.isRunning():
-            self.waveforms_worker = WaveformsWorker(self.reader)
-            self.waveforms_worker.data_ready.connect(self._handle_waveforms_data)
-            self.waveforms_worker.error_occurred.connect(self._handle_worker_error)
-            self.waveforms_worker.finished.connect(self._cleanup_waveforms_worker) # QThread.finished
-            self.waveforms_worker.start()
-        else:
-            print("图谱数据线程已在运行")
+        self.statusBar().showMessage('准备读取数据...') # 更新状态提示 (读取在工作线程中进行，界面不会阻塞)
+
+        # --- 把读取任务交给常驻工作线程 ---
+        self.worker.jobs.put('refresh')
+        self._refresh_in_flight = True
 
-    # Slot to handle telemetry data from worker
-    @Slot(dict)
-    def _handle_telemetry_data(self, telemetry_data):
-        """处理从工作线程接收到的遥测数据"""
+    # Slot to handle data from worker
+    @Slot(object, object)
+    def _handle_sensor_data(self, telemetry_data, waveform_data):
+        """处理工作线程一次刷新读到的数据: 表格和图谱一起更新"""
+        if not self.worker:
+            return # 断开连接前已排队的结果，不再显示
+
+        if telemetry_data is not None:
+            # 各单元格更新完后表格统一重绘一次; 画布不在此列，仍用 blit 只重绘曲线
+            self.telemetry_table.setUpdatesEnabled(False)
+            try:
+                self._show_telemetry_data(telemetry_data)
+            finally:
+                self.telemetry_table.setUpdatesEnabled(True)
+        if waveform_data is not None:
+            self._show_waveforms_data(waveform_data)
+
+    def _show_telemetry_data(self, telemetry_data):
+        """把遥测数据写入表格"""
         if telemetry_data:
-            param_map = {
-                'TEV放电次数': 0, 'TEV_dB值': 1, 'TEV_mV值': 2,
-                '超声波_dB值': 3, '超声波_mV值': 4,
-                'UHF_dB值': 5, 'UHF_mV值': 6
-            }
-            for key, value in telemetry_data.items():
-                row = param_map.get(key)
-                if row is not None:
-                    display_value = '--'
-                    if value is not None:
-                        if isinstance(value, float):
-                            display_value = f"{value:.2f}"
-                        else:
-                            display_value = str(value)
-                    self.telemetry_table.setItem(row, 1, QTableWidgetItem(display_value))
+            # telemetry_data 与表格行同为 PARAM_ORDER 顺序，直接按位置对应
+            for row, (item, fmt, value) in enumerate(zip(self._value_items, self._formatters, telemetry_data)):
+                if row in self._last_values and self._last_values[row] == value:
+                    continue # 数值未变化，不必重设文本
+                self._last_values[row] = value
+                item.setText('--' if value is None else fmt(value))
             self.statusBar().showMessage('遥测数据已更新 ' + time.strftime('%H:%M:%S'))
         else:
             print("接收到空的遥测数据")
             # Optionally update table to show '读取失败' for telemetry
-            for i in range(self.telemetry_table.rowCount()):
-                 self.telemetry_table.setItem(i, 1, QTableWidgetItem('无数据'))
-
-    # Slot to handle waveform data from worker
-    @Slot(dict)
-    def _handle_waveforms_data(self, waveform_data_dict):
-        """处理从工作线程接收到的图谱数据"""
-        if waveform_data_dict:
-            self.tev_canvas.update_plot(waveform_data_dict.get('TEV图谱', []), "TEV图谱")
-            self.ultrasonic_canvas.update_plot(waveform_data_dict.get('超声波图谱', []), "超声波图谱")
-            self.uhf_canvas.update_plot(waveform_data_dict.get('UHF图谱', []), "UHF图谱")
+            self._last_values.clear()
+            for item in self._value_items:
+                 item.setText('无数据')
+
+    def _show_waveforms_data(self, waveform_data):
+        """把图谱数据画到画布上 (waveform_data 与画布子图同为 WAVEFORM_NAMES 顺序)"""
+        if any(len(data) for data in waveform_data):
+            self.waveform_canvas.update_plots(waveform_data)
             self.statusBar().showMessage('图谱数据已更新 ' + time.strftime('%H:%M:%S'))
         else:
             print("接收到空的图谱数据")
-            self.tev_canvas.init_plot("TEV图谱 (无数据)")
-            self.ultrasonic_canvas.init_plot("超声波图谱 (无数据)")
-            self.uhf_canvas.init_plot("UHF图谱 (无数据)")
+            self.waveform_canvas.init_plot(" (无数据)")
+
+    @Slot()
+    def _handle_refresh_finished(self):
+        """一次刷新结束后，自动刷新模式下重新开始计时"""
+        self._refresh_in_flight = False
+        if self.worker and self._interval_ms:
+            self.timer.start(self._interval_ms)
 
     # Slot to handle errors from workers
     @Slot(str)
@@ -1141,35 +758,24 @@ class AllSensorsApp(QMainWindow):
         self.statusBar().showMessage(f'错误: {error_message}')
         # Optionally, update specific parts of UI to indicate failure for that data type
 
-    @Slot()
-    def _cleanup_telemetry_worker(self):
-        # print("遥测工作线程完成")
-        if self.telemetry_worker:
-            self.telemetry_worker.deleteLater() # Schedule for deletion
-        self.telemetry_worker = None
-
-    @Slot()
-    def _cleanup_waveforms_worker(self):
-        # print("图谱工作线程完成")
-        if self.waveforms_worker:
-            self.waveforms_worker.deleteLater() # Schedule for deletion
-        self.waveforms_worker = None
-
     def update_data(self):
         """原有的 update_data，现在改为 trigger_data_update"""
         self.trigger_data_update()
 
     def clear_display(self):
          """清空数据显示区域"""
-         for i in range(self.telemetry_table.rowCount()):
-             self.telemetry_table.setItem(i, 1, QTableWidgetItem('--'))
-         self.tev_canvas.init_plot("TEV图谱")
-         self.ultrasonic_canvas.init_plot("超声波图谱")
-         self.uhf_canvas.init_plot("UHF图谱")
+         self._last_values.clear()
+         for item in self._value_items:
+             item.setText('--')
+         self.waveform_canvas.init_plot()
 
     def closeEvent(self, event):
         """关闭窗口前确保断开连接并停止线程"""
         self.disconnect_device() # disconnect_device 现在会处理线程停止
+        if self._stopping_worker:
+            self._stopping_worker.wait() # 窗口关闭时需等待串口关闭，线程结束后才能退出程序
+        if self.port_scanner:
+            self.port_scanner.wait()
         event.accept()
 
 def main_gui():
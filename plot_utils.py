@@ -0,0 +1,18 @@
+"""
+matplotlib 画布的公共设置
+"""
+import matplotlib
+
+# 中文字体在首次创建画布时才设置，不放在模块导入路径上
+_fonts_configured = False
+
+
+def configure_fonts():
+    """设置中文字体 (SimHei 不存在时依次尝试后面的字体)"""
+    global _fonts_configured
+    if not _fonts_configured:
+        matplotlib.rcParams.update({
+            'font.sans-serif': ['SimHei', 'Microsoft YaHei', 'DejaVu Sans'],
+            'axes.unicode_minus': False,
+        })
+        _fonts_configured = True
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+串口相关的公共函数
+"""
+
+
+def tune_serial(ser):
+    """
+    降低串口驱动的收发延迟
+
+    Linux 下打开 ASYNC_LOW_LATENCY (FTDI 等 USB 转串口的延迟定时器由默认 16ms 降到约 1ms)，
+    Windows 下增大驱动收发缓冲区。其他平台或不支持的串口 (如 socket:// 测试串口) 上不做任何操作。
+    """
+    try:
+        if hasattr(ser, 'set_low_latency_mode'):
+            ser.set_low_latency_mode(True)
+        if hasattr(ser, 'set_buffer_size'):
+            ser.set_buffer_size(rx_size=65536, tx_size=4096)
+    except (OSError, ValueError) as e:
+        print(f"设置串口低延迟模式失败 (忽略): {e}")
\ No newline at end of file
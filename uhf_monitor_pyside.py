@@ -2,60 +2,64 @@ import sys
 import time
 import struct
 import numpy as np
-import matplotlib.pyplot as plt
-# 使用通用的 Qt Agg 后端，通常兼容 PySide6 和 PyQt5
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+import pyqtgraph as pg
 # 导入 PySide6 相关模块
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QComboBox,
                              QGroupBox, QGridLayout, QTableWidget, QTableWidgetItem,
                              QHeaderView, QMessageBox, QSplitter)
-from PySide6.QtCore import Qt, QTimer, Slot # 导入 Slot
-from PySide6.QtGui import QFont # QFont 通常在 QtGui 中
+from PySide6.QtCore import (Qt, QTimer, Slot, Signal, QObject, QThread,
+                            QMetaObject)
 import serial.tools.list_ports
 from pymodbus.client.serial import ModbusSerialClient
-from pymodbus.constants import Endian
-from pymodbus.payload import BinaryPayloadDecoder
+from serial_utils import tune_serial
+from waveform_kernels import store_if_changed
 
-# 添加中文支持 (保持不变)
-plt.rcParams['font.sans-serif'] = ['SimHei']
-plt.rcParams['axes.unicode_minus'] = False
+# 曲线只有 128 个点，关闭抗锯齿即可满足显示要求
+pg.setConfigOptions(antialias=False, background='w', foreground='k')
 
+# 浮点数占两个寄存器，低位字在前: 按小端打包两个字后即为小端 float 的 4 个字节
+_FLOAT_WORDS = struct.Struct('<2H')
+_FLOAT = struct.Struct('<f')
 
-class UHFMonitorCanvas(FigureCanvas):
-    """UHF图谱显示画布 (使用 PySide6)"""
 
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        """初始化画布"""
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(UHFMonitorCanvas, self).__init__(self.fig)
-        self.setParent(parent)
+class UHFMonitorCanvas(pg.PlotWidget):
+    """UHF图谱显示画布 (使用 pyqtgraph，刷新时只更新曲线数据)"""
 
-        # 初始化图表
-        self.init_plot()
+    def __init__(self, parent=None):
+        """初始化画布"""
+        super(UHFMonitorCanvas, self).__init__(parent)
+        # 标题、坐标轴和网格只设置一次
+        self.setTitle('UHF图谱数据')
+        self.setLabel('bottom', '采样点')
+        self.setLabel('left', '幅值')
+        self.showGrid(x=True, y=True)
+        self.curve = self.plot(pen='b')
+        # 预分配的横坐标和显示缓冲区，每帧原地写入，不随刷新重新分配
+        self._x = np.arange(128)
+        self._raw = np.zeros(128, dtype=np.uint16) # 上次的寄存器原始值
+        self._y = np.zeros(128, dtype=np.float32)  # 显示数据
+        self._count = 0 # 当前曲线的点数，0 表示无数据
 
     def init_plot(self):
         """初始化图表"""
-        self.axes.clear()
-        self.axes.set_title('UHF图谱数据')
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
-        self.fig.tight_layout()
-        self.draw()
+        self.curve.clear()
+        self._count = 0
 
     def update_plot(self, data):
         """更新图表数据"""
-        self.axes.clear()
-        self.axes.plot(data, 'b-')
-        self.axes.set_title('UHF图谱数据')
-        self.axes.set_xlabel('采样点')
-        self.axes.set_ylabel('幅值')
-        self.axes.grid(True)
-        self.fig.tight_layout()
-        self.draw()
+        count = len(data)
+        if count > len(self._raw):
+            self._x = np.arange(count)
+            self._raw = np.zeros(count, dtype=np.uint16)
+            self._y = np.zeros(count, dtype=np.float32)
+        raw = self._raw[:count]
+        if not store_if_changed(raw, data) and count == self._count:
+            return
+        self._count = count
+        y = self._y[:count]
+        y[:] = raw
+        self.curve.setData(self._x[:count], y)
 
 
 class UHFMonitor:
@@ -84,6 +88,8 @@ class UHFMonitor:
         """建立与设备的连接"""
         try:
             self.connected = self.client.connect()
+            if self.connected:
+                tune_serial(self.client.socket)
             return self.connected
         except Exception as e:
             print(f"连接错误: {e}")
@@ -117,19 +123,17 @@ class UHFMonitor:
                 print(f"读取寄存器 {address} 错误: {response}")
                 return None
 
-            # --- 使用 struct 模块 ---
-            registers = response.registers
-            # 假设设备使用小端序存储浮点数 (低位寄存器在前)
-            combined = (registers[1] << 16) | registers[0]
-            # 使用 struct 将整数转换为浮点数 (大端)
-            value = struct.unpack('!f', struct.pack('!I', combined))[0]
-            return value
-            # --- struct 模块结束 ---
+            return self._decode_float(response.registers)
 
         except Exception as e:
             print(f"读取浮点数据错误 (地址 {address}): {e}")
             return None
 
+    @staticmethod
+    def _decode_float(registers):
+        """将两个寄存器解码为浮点数 (设备使用小端字序，低位寄存器在前)"""
+        return _FLOAT.unpack(_FLOAT_WORDS.pack(*registers))[0]
+
     def read_short(self, address):
         """
         读取短整型数据（占用一个寄存器）
@@ -164,43 +168,57 @@ class UHFMonitor:
             return None
 
         try:
-            data = {}
-            # data['UHF放电次数'] = self.read_short(101)  # 地址101现在更改为reserve保留地址，无意义
-            data['UHF_dB值'] = self.read_float(106)
-            data['UHF_mV值'] = self.read_short(111)
-            return data
+            # dB 值 (106-107) 和 mV 值 (111) 用一次请求读取 106~111 六个寄存器
+            response = self.client.read_input_registers(address=106, count=6, slave=self.slave_address)
+            if response.isError():
+                print(f"批量读取UHF遥测寄存器错误: {response}，改为逐个读取")
+                return self._read_uhf_telemetry_single()
+
+            registers = response.registers
+            return {
+                'UHF_dB值': self._decode_float(registers[0:2]), # 106-107
+                'UHF_mV值': registers[5],                       # 111
+            }
         except Exception as e:
             print(f"读取UHF遥测数据错误: {e}")
             return None
 
+    def _read_uhf_telemetry_single(self):
+        """逐个读取UHF遥测数据 (批量读取失败时的后备方案)"""
+        data = {}
+        # data['UHF放电次数'] = self.read_short(101)  # 地址101现在更改为reserve保留地址，无意义
+        data['UHF_dB值'] = self.read_float(106)
+        data['UHF_mV值'] = self.read_short(111)
+        return data
+
     def read_uhf_waveform(self):
         """
         读取UHF图谱数据 (分块读取)
 
         返回:
-            UHF图谱数据列表
+            UHF图谱数据 (uint16 数组)，读取失败时为空列表
         """
         if not self.connected:
             return []
 
-        waveform_data = []
         registers_to_read = 128
+        # 每次读取新建数组: 上一帧可能仍被界面持有，不能复用同一缓冲区
+        waveform_data = np.empty(registers_to_read, dtype=np.uint16)
         start_address = 2256
-        max_read_count = 125 # Modbus 协议或设备限制
+        max_read_count = 125 # Modbus 协议单次最多读取 125 个寄存器
 
         try:
-            while registers_to_read > 0:
-                count = min(registers_to_read, max_read_count)
-                response = self.client.read_input_registers(address=start_address, count=count, slave=self.slave_address)
+            # 分块连续读取 (125 + 3)，块之间无需延时
+            for offset in range(0, registers_to_read, max_read_count):
+                count = min(registers_to_read - offset, max_read_count)
+                address = start_address + offset
+                response = self.client.read_input_registers(address=address, count=count, slave=self.slave_address)
 
                 if response.isError():
-                    print(f"读取UHF图谱数据错误 (地址 {start_address}, 数量 {count}): {response}")
+                    print(f"读取UHF图谱数据错误 (地址 {address}, 数量 {count}): {response}")
                     return []
 
-                waveform_data.extend(response.registers)
-                registers_to_read -= count
-                start_address += count
-                time.sleep(0.1) # 短暂延时
+                waveform_data[offset:offset + count] = response.registers
 
             return waveform_data
 
@@ -209,13 +227,85 @@ class UHFMonitor:
             return []
 
 
+class PortScanner(QThread):
+    """在后台枚举串口 (部分 USB 转串口驱动枚举很慢，不能放在界面线程)"""
+    ports_ready = Signal(list) # 按串口名排序的 (串口名, 描述) 列表
+    error = Signal(str)
+
+    def run(self):
+        try:
+            ports = sorted((port.device, port.description) for port in serial.tools.list_ports.comports())
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        self.ports_ready.emit(ports)
+
+
+class UhfWorker(QObject):
+    """
+    在后台线程中执行全部串口读写的工作对象
+
+    界面线程通过 QMetaObject.invokeMethod 排队调用 open/refresh，读取结果通过信号交回界面线程，
+    界面线程不会因等待串口而阻塞。
+    """
+    connected = Signal(bool, str)  # (是否连接成功, 串口名)
+    data_ready = Signal(object, object) # (遥测数据, 图谱数据)，读取失败的部分为空
+    error = Signal(str)
+
+    def __init__(self, port, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.monitor = None
+
+    @Slot()
+    def open(self):
+        """在工作线程中打开串口"""
+        try:
+            monitor = UHFMonitor(self.port)
+            self.monitor = monitor if monitor.connect() else None
+        except Exception as e:
+            print(f'连接时发生错误: {str(e)}')
+            self.monitor = None
+        self.connected.emit(self.monitor is not None, self.port)
+
+    @Slot()
+    def refresh(self):
+        """在工作线程中读取一次遥测数据和图谱数据"""
+        try:
+            if self.monitor is None or not self.monitor.connected:
+                raise RuntimeError('设备未连接')
+            telemetry_data = self.monitor.read_uhf_telemetry()
+            waveform_data = self.monitor.read_uhf_waveform()
+        except Exception as e:
+            self.error.emit(f'读取或更新数据错误: {str(e)}')
+            return
+        self.data_ready.emit(telemetry_data or {}, waveform_data)
+
+    @Slot()
+    def close(self):
+        """在工作线程中关闭串口，然后结束工作线程的事件循环"""
+        if self.monitor is not None:
+            self.monitor.disconnect()
+            self.monitor = None
+        # 排在 close 之前的读取都已完成; 在这里退出才能保证串口先被关闭
+        self.thread().quit()
+
+
 class UHFMonitorApp(QMainWindow):
     """UHF局部放电监测应用程序 (使用 PySide6)"""
 
     def __init__(self):
         super().__init__()
 
-        self.monitor = None
+        self.worker = None        # 串口读写工作对象，连接时创建
+        self.worker_thread = None
+        # 已请求退出、正在关闭串口的工作线程及其工作对象 (线程结束前需保持引用)
+        self._stopping_thread = None
+        self._stopping_worker = None
+        self.is_connected = False
+        self.read_pending = False # 上一轮读取尚未完成时不再重复请求
+        self.port_scanner = None
+        self._last_ports = None   # 下拉框中当前显示的串口列表
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_data) # PySide6 信号连接方式
 
@@ -286,8 +376,10 @@ class UHFMonitorApp(QMainWindow):
         self.telemetry_table.setItem(0, 0, QTableWidgetItem('UHF dB值'))
         self.telemetry_table.setItem(1, 0, QTableWidgetItem('UHF mV值'))
 
-        self.telemetry_table.setItem(0, 1, QTableWidgetItem('--'))
-        self.telemetry_table.setItem(1, 1, QTableWidgetItem('--'))
+        # 数值列的单元格只创建一次，刷新时直接 setText
+        self._value_items = [QTableWidgetItem('--') for _ in range(2)]
+        for row, item in enumerate(self._value_items):
+            self.telemetry_table.setItem(row, 1, item)
 
         telemetry_layout.addWidget(self.telemetry_table)
         telemetry_group.setLayout(telemetry_layout)
@@ -298,7 +390,7 @@ class UHFMonitorApp(QMainWindow):
         waveform_layout = QVBoxLayout()
 
         # 创建图谱画布
-        self.canvas = UHFMonitorCanvas(self, width=5, height=4)
+        self.canvas = UHFMonitorCanvas(self)
         waveform_layout.addWidget(self.canvas)
 
         # 手动刷新按钮
@@ -320,63 +412,74 @@ class UHFMonitorApp(QMainWindow):
 
     @Slot() # 显式声明为槽函数 (PySide6 推荐)
     def refresh_ports(self):
-        """刷新可用串口列表"""
-        self.port_combo.clear()
-        ports = []
-        try:
-            # serial.tools.list_ports.comports() 可能需要错误处理
-            for port in serial.tools.list_ports.comports():
-                self.port_combo.addItem(f"{port.device} - {port.description}")
-                ports.append(port.device)
-        except Exception as e:
-             self.statusBar().showMessage(f'刷新串口列表时出错: {e}')
-             print(f"刷新串口列表时出错: {e}")
-             return # 出错时提前返回
+        """刷新可用串口列表 (在后台线程中枚举，结果由 _on_ports_ready 显示)"""
+        if self.port_scanner and self.port_scanner.isRunning():
+            return # 上一次枚举尚未完成
+        self.port_scanner = PortScanner(self)
+        self.port_scanner.ports_ready.connect(self._on_ports_ready)
+        self.port_scanner.error.connect(self._on_ports_error)
+        self.port_scanner.start()
+
+    @Slot(list)
+    def _on_ports_ready(self, ports):
+        """显示枚举到的串口 (列表未变化时不重建下拉框，重建后保留原来选中的串口)"""
+        if ports != self._last_ports:
+            self._last_ports = ports
+            current_port = self.port_combo.currentData()
+            self.port_combo.clear()
+            for device, description in ports:
+                self.port_combo.addItem(f"{device} - {description}", device)
+            index = self.port_combo.findData(current_port)
+            if index >= 0:
+                self.port_combo.setCurrentIndex(index)
 
         if not ports:
             self.statusBar().showMessage('未检测到可用串口')
         else:
             self.statusBar().showMessage(f'检测到 {len(ports)} 个可用串口')
 
+    @Slot(str)
+    def _on_ports_error(self, error_msg):
+        """枚举串口出错"""
+        self.statusBar().showMessage(f'刷新串口列表时出错: {error_msg}')
+        print(f"刷新串口列表时出错: {error_msg}")
+
     @Slot() # 显式声明为槽函数
     def toggle_connection(self):
         """切换连接状态"""
-        if self.monitor is None or not self.monitor.connected:
+        if not self.is_connected:
+            if self.worker is not None or self._stopping_thread is not None:
+                return # 正在连接中，或上一次连接的串口尚未关闭
             # 连接设备
-            try:
-                port_text = self.port_combo.currentText()
-                if not port_text:
-                    QMessageBox.warning(self, '警告', '请选择一个可用串口')
-                    return
-
-                port = port_text.split(' - ')[0]
-                self.monitor = UHFMonitor(port)
-
-                if self.monitor.connect():
-                    self.connect_btn.setText('断开')
-                    self.statusBar().showMessage(f'已连接到 {port}')
-                    self.port_combo.setEnabled(False)
-                    self.refresh_btn.setEnabled(False)
-                    self.update_data() # 立即更新一次
-                    # 连接成功后根据下拉框设置启动定时器
-                    self.set_refresh_rate(self.auto_refresh_combo.currentIndex())
-                else:
-                    QMessageBox.critical(self, '错误', f'无法连接到 {port}')
-                    self.monitor = None # 连接失败，重置 monitor
-            except Exception as e:
-                error_msg = f'连接时发生错误: {str(e)}'
-                print(error_msg)
-                QMessageBox.critical(self, '错误', error_msg)
-                self.monitor = None # 发生异常，重置 monitor
+            port_text = self.port_combo.currentText()
+            if not port_text:
+                QMessageBox.warning(self, '警告', '请选择一个可用串口')
+                return
+
+            port = port_text.split(' - ')[0]
+            # 打开串口也在工作线程中进行，结果由 _on_connected 处理
+            self.worker_thread = QThread(self)
+            self.worker = UhfWorker(port)
+            self.worker.moveToThread(self.worker_thread)
+            # 线程事件循环结束后在该线程中删除工作对象
+            self.worker_thread.finished.connect(self.worker.deleteLater)
+            self.worker_thread.finished.connect(self._on_worker_finished)
+            self.worker.connected.connect(self._on_connected)
+            self.worker.data_ready.connect(self._on_data)
+            self.worker.error.connect(self._on_error)
+            self.worker_thread.start()
+            self.connect_btn.setEnabled(False)
+            self.statusBar().showMessage(f'正在连接 {port}...')
+            QMetaObject.invokeMethod(self.worker, "open", Qt.ConnectionType.QueuedConnection)
         else:
             # 断开连接
             try:
                 self.timer.stop()
+                self.is_connected = False
                 # 断开前将自动刷新设置为关闭，避免UI状态不一致
                 self.auto_refresh_combo.setCurrentIndex(0)
 
-                self.monitor.disconnect()
-                self.monitor = None
+                self._stop_worker()
 
                 self.connect_btn.setText('连接')
                 self.statusBar().showMessage('已断开连接')
@@ -384,9 +487,8 @@ class UHFMonitorApp(QMainWindow):
                 self.refresh_btn.setEnabled(True)
 
                 # 清空数据显示
-                self.telemetry_table.setItem(0, 1, QTableWidgetItem('--'))
-                self.telemetry_table.setItem(1, 1, QTableWidgetItem('--'))
-                self.telemetry_table.setItem(2, 1, QTableWidgetItem('--'))
+                for item in self._value_items:
+                    item.setText('--')
                 self.canvas.init_plot()
             except Exception as e:
                 error_msg = f'断开连接时发生错误: {str(e)}'
@@ -397,7 +499,51 @@ class UHFMonitorApp(QMainWindow):
                 self.statusBar().showMessage('断开连接时出错')
                 self.port_combo.setEnabled(True)
                 self.refresh_btn.setEnabled(True)
-                self.monitor = None # 确保 monitor 状态正确
+
+    @Slot(bool, str)
+    def _on_connected(self, success, port):
+        """处理工作线程返回的连接结果"""
+        self.connect_btn.setEnabled(True)
+        if success:
+            self.is_connected = True
+            self.connect_btn.setText('断开')
+            self.statusBar().showMessage(f'已连接到 {port}')
+            self.port_combo.setEnabled(False)
+            self.refresh_btn.setEnabled(False)
+            self.update_data() # 立即更新一次
+            # 连接成功后根据下拉框设置启动定时器
+            self.set_refresh_rate(self.auto_refresh_combo.currentIndex())
+        else:
+            self._stop_worker()
+            self.statusBar().showMessage('连接失败')
+            QMessageBox.critical(self, '错误', f'无法连接到 {port}')
+
+    def _stop_worker(self):
+        """
+        请求工作线程关闭串口并退出，不在界面线程等待正在进行的读取
+
+        线程退出后由 _on_worker_finished 释放线程，在此之前不允许重新连接。
+        """
+        if self.worker is None:
+            return
+        QMetaObject.invokeMethod(self.worker, "close", Qt.ConnectionType.QueuedConnection)
+        self._stopping_thread = self.worker_thread
+        self._stopping_worker = self.worker
+        self.worker = None
+        self.worker_thread = None
+        self.read_pending = False
+        self.connect_btn.setEnabled(False)
+
+    @Slot()
+    def _on_worker_finished(self):
+        """工作线程已退出 (串口已关闭)，释放线程并允许重新连接"""
+        if self._stopping_thread is None:
+            return
+        self._stopping_thread.wait() # finished 发出后线程随即结束 (工作对象已在该线程中删除)，这里不会阻塞
+        self._stopping_thread.deleteLater()
+        self._stopping_thread = None
+        self._stopping_worker = None
+        self.connect_btn.setEnabled(True)
 
     @Slot(int) # 显式声明为槽函数，并指定参数类型
     def set_refresh_rate(self, index):
@@ -406,7 +552,7 @@ class UHFMonitorApp(QMainWindow):
 
         if index == 0:  # 关闭
             # 只有在已连接状态下才显示关闭信息，否则保持连接前的状态信息
-            if self.monitor and self.monitor.connected:
+            if self.is_connected:
                  self.statusBar().showMessage('自动刷新已关闭')
             return
 
@@ -414,7 +560,7 @@ class UHFMonitorApp(QMainWindow):
         interval = intervals[index]
 
         # 只有在已连接状态下才启动定时器
-        if self.monitor and self.monitor.connected:
+        if self.is_connected:
             self.timer.start(interval)
             self.statusBar().showMessage(f'自动刷新已设置为 {self.auto_refresh_combo.currentText()}')
         # else: # 如果未连接时更改了刷新率，不需要警告，在连接成功时会根据当前选择启动
@@ -423,55 +569,79 @@ class UHFMonitorApp(QMainWindow):
 
     @Slot() # 显式声明为槽函数
     def update_data(self):
-        """更新数据显示"""
-        if not self.monitor or not self.monitor.connected:
+        """请求工作线程读取一次数据，结果由 _on_data 显示"""
+        if not self.is_connected:
             # 如果定时器仍在运行但连接已断开，则停止定时器
             if self.timer.isActive():
                 self.timer.stop()
                 self.auto_refresh_combo.setCurrentIndex(0) # 同步UI
                 self.statusBar().showMessage('连接已断开，自动刷新停止')
             return
-
-        try:
-            self.statusBar().showMessage('正在读取数据...')
-            QApplication.processEvents() # 处理界面事件，防止假死
-
-            # 读取遥测数据
-            telemetry_data = self.monitor.read_uhf_telemetry()
-            if telemetry_data:
-                uhf_db = telemetry_data.get('UHF_dB值')
-                if uhf_db is not None:
-                    self.telemetry_table.setItem(0, 1, QTableWidgetItem(f"{uhf_db:.2f}"))
-                else:
-                    self.telemetry_table.setItem(0, 1, QTableWidgetItem("--"))
-
-                uhf_mv = telemetry_data.get('UHF_mV值', '--')
-                self.telemetry_table.setItem(1, 1, QTableWidgetItem(str(uhf_mv)))
-            else:
-                # 读取失败或返回 None
-                self.telemetry_table.setItem(0, 1, QTableWidgetItem('--'))
-                self.telemetry_table.setItem(1, 1, QTableWidgetItem('--'))
-                print("未能读取到遥测数据") # 添加日志
-
-            # 读取图谱数据
-            waveform_data = self.monitor.read_uhf_waveform()
-            if waveform_data:
-                self.canvas.update_plot(waveform_data)
+        if self.read_pending:
+            return # 上一轮读取尚未完成
+
+        self.read_pending = True
+        self.statusBar().showMessage('正在读取数据...')
+        QMetaObject.invokeMethod(self.worker, "refresh", Qt.ConnectionType.QueuedConnection)
+
+    @Slot(object, object)
+    def _on_data(self, telemetry_data, waveform_data):
+        """显示工作线程读取到的数据"""
+        if self.worker is None:
+            return # 断开前已排队的结果
+        self.read_pending = False
+        db_item, mv_item = self._value_items
+        # 两个单元格更新完后再统一重绘
+        self.telemetry_table.setUpdatesEnabled(False)
+        if telemetry_data:
+            uhf_db = telemetry_data.get('UHF_dB值')
+            if uhf_db is not None:
+                db_item.setText(f"{uhf_db:.2f}")
             else:
-                self.canvas.init_plot() # 清空图表
-                print("未能读取到图谱数据或数据为空") # 添加日志
+                db_item.setText("--")
 
-            self.statusBar().showMessage('数据已更新 ' + time.strftime('%H:%M:%S'))
-
-        except Exception as e:
-            error_msg = f'读取或更新数据错误: {str(e)}'
-            print(error_msg)
-            self.statusBar().showMessage(error_msg)
-            # 发生错误时停止自动刷新，并提示用户
-            if self.timer.isActive():
-                self.timer.stop()
-                self.auto_refresh_combo.setCurrentIndex(0) # 同步UI
-                QMessageBox.warning(self, '错误', f'{error_msg}\n自动刷新已停止。')
+            uhf_mv = telemetry_data.get('UHF_mV值', '--')
+            mv_item.setText(str(uhf_mv))
+        else:
+            # 读取失败或返回 None
+            db_item.setText('--')
+            mv_item.setText('--')
+            print("未能读取到遥测数据") # 添加日志
+        self.telemetry_table.setUpdatesEnabled(True)
+
+        # 图谱数据
+        if len(waveform_data):
+            self.canvas.update_plot(waveform_data)
+        else:
+            self.canvas.init_plot() # 清空图表
+            print("未能读取到图谱数据或数据为空") # 添加日志
+
+        self.statusBar().showMessage('数据已更新 ' + time.strftime('%H:%M:%S'))
+
+    @Slot(str)
+    def _on_error(self, error_msg):
+        """处理工作线程读取数据时的错误"""
+        if self.worker is None:
+            return # 断开前已排队的结果
+        self.read_pending = False
+        print(error_msg)
+        self.statusBar().showMessage(error_msg)
+        # 发生错误时停止自动刷新，并提示用户
+        if self.timer.isActive():
+            self.timer.stop()
+            self.auto_refresh_combo.setCurrentIndex(0) # 同步UI
+            QMessageBox.warning(self, '错误', f'{error_msg}\n自动刷新已停止。')
+
+    def closeEvent(self, event):
+        """关闭窗口前结束工作线程并关闭串口"""
+        self.timer.stop()
+        self.is_connected = False
+        self._stop_worker()
+        if self._stopping_thread:
+            self._stopping_thread.wait() # 程序退出前需等待串口关闭
+        if self.port_scanner:
+            self.port_scanner.wait()
+        event.accept()
 
 
 def main():
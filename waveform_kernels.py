@@ -0,0 +1,22 @@
+"""
+图谱数据处理内核
+"""
+import numpy as np
+
+
+def scale_waveform(raw, gain, offset, out):
+    """将寄存器原始值换算为显示幅值写入 out (原地计算，不分配新数组)"""
+    np.multiply(raw, gain, out=out)
+    out += offset
+
+
+def store_if_changed(raw, data):
+    """
+    把 data 写入等长的缓冲区 raw，返回数据是否有变化
+
+    设备空闲时图谱数据常常不变，画布据此跳过换算和重绘。
+    """
+    if np.array_equal(raw, data):
+        return False
+    raw[:] = data
+    return True
\ No newline at end of file